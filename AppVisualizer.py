@@ -1,66 +1,148 @@
-
-import matplotlib.pyplot as plt
 import numpy as np
+from matplotlib import colormaps
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 trace_colors = ["#2e5774", "#592a00", "#1e731e", "#ffffff", "#652476"]
 
-def plot_tracking_view(frame, max_range=1500):
-    fig, ax = plt.subplots(figsize=(7, 7))
-
-   # Combine all measurements into one big array (easier for real-time plotting later)
-    meas_history = frame.get("measurement_history", [])
-    
-    if len(meas_history) > 0:
-        all_meas = np.vstack([np.array(m) for m in meas_history if len(m) > 0])
-        ax.scatter(all_meas[:, 0], all_meas[:, 1], s=12, c="red", alpha=0.8)
-
-    # Extract tracking data
-    filt = frame.get("filtered_positions", [])
-    history = frame.get("track_history", [])
-    truth = frame.get("truth_positions", []) 
-
-    # Plot each object's data (filtered, truth, and all measurments recorded)
-    for i in range(len(filt)):
-        color = trace_colors[i % len(trace_colors)]
-
-        # Truth measurements (true position of our object, marked by an X)
-        if truth and len(truth) > i:
-            t_pos = truth[i]
-            ax.scatter(t_pos[0], t_pos[1], c=color, marker="x", s=80, linewidths=2)
-
-        # Track history (allows us to keep track of where the object WAS, essentially printing its path)
-        if history and len(history[i]) > 1:
-            hist_arr = np.array(history[i])
-            ax.plot(hist_arr[:, 0], hist_arr[:, 1], c=color, linewidth=2, alpha=0.7)
-
-        # Filtered estimate (current position, as estimated thorugh kalman filtering)
-        f_pos = filt[i]
-        ax.scatter(f_pos[0], f_pos[1], c=color, s=60, edgecolors="black", linewidths=1)
-
-    # Plotting it all
-    ax.set_xlim(-max_range, max_range)
-    ax.set_ylim(-max_range, max_range)
-    ax.set_aspect("equal")
-    ax.grid(True, alpha=0.3)
-    ax.set_title("Tracking View (Truth, Filtered Tracks, and Radar Returns)")
-
-    return fig
-
-def plot_truth_view(frame, max_range=1500):
-    # For comparison purposes, this plot will show only the true positions of the object
-    fig, ax = plt.subplots(figsize=(7, 7))
-
-    truth = frame.get("truth_positions", [])
-
-    # Similar to before, we cycle thorugh true positions and store them for plotting
-    for i, pos in enumerate(truth):
-        ax.scatter(pos[0], pos[1], c="green", marker="x", s=80, linewidths=2)
-
-    ax.set_xlim(-max_range, max_range)
-    ax.set_ylim(-max_range, max_range)
-    ax.set_aspect("equal")
-    ax.grid(True, alpha=0.3)
-    ax.set_title("Truth View (Ground Truth Only)")
-
-    return fig
-
+# Every track keeps one colour for its whole life, picked by its track id
+def track_color(track_id):
+    return trace_colors[int(track_id) % len(trace_colors)]
+
+# Persistent renderer for the live view: the figure (tracking view and truth view side by side) and all its artists are
+# built once, every frame only updates their data. The static parts (axes, grid, titles) are rendered once and cached,
+# a frame restores that background and draws just the changing artists on top of it (blitting).
+# Past radar returns go into a decaying density raster (one image) instead of one scatter point per return, and the
+# client history is consumed incrementally, so frame cost no longer grows with the length of the run.
+# Track trails are built from the estimates of the frames passed to update(), frames the stream skipped are bridged,
+# and only their last `trail_length` points are kept.
+class LiveRenderer:
+    def __init__(self, max_range=1500, bins=150, half_life=30, density_max=2.0, trail_length=200, dpi=80):
+        self.max_range = max_range
+        self.trail_length = trail_length
+        self.bins = bins
+        self.decay = 0.5 ** (1.0 / half_life) # Per frame, a return fades to half after `half_life` frames
+        self.density = np.zeros((bins, bins)) # [y, x] counts of recent returns, already in imshow's layout
+
+        self.fig = Figure(figsize=(14, 7), dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.ax, self.truth_ax = self.fig.subplots(1, 2)
+        for ax in (self.ax, self.truth_ax):
+            ax.set_xlim(-max_range, max_range)
+            ax.set_ylim(-max_range, max_range)
+            ax.set_aspect("equal")
+            ax.grid(True, alpha=0.3)
+        self.ax.set_title("Tracking View (Truth, Filtered Tracks, and Radar Returns)")
+        self.truth_ax.set_title("Truth View (Ground Truth Only)")
+
+        # Empty bins stay transparent so the grid shows through
+        cmap = colormaps["Reds"].copy()
+        cmap.set_under((0, 0, 0, 0))
+        self.image = self.ax.imshow(
+            self.density, origin="lower", extent=(-max_range, max_range, -max_range, max_range),
+            cmap=cmap, vmin=0.05, vmax=density_max, interpolation="nearest", zorder=1, animated=True
+        )
+        # Truth has no track ids (under track management it is unrelated to the tracks), so it gets its own colour
+        self.truth = self.ax.scatter([], [], c="green", marker="x", s=80, linewidths=2, zorder=4, animated=True)
+        self.filtered = self.ax.scatter([], [], s=60, edgecolors="black", linewidths=1, zorder=5, animated=True)
+        self.truth_only = self.truth_ax.scatter([], [], c="green", marker="x", s=80, linewidths=2, animated=True)
+        self.lines = [] # Pool of trail lines, one per current track, created as more tracks show up at once
+
+        self._background = None
+        self.clear()
+
+    # Forgets the consumed history (new run)
+    def clear(self):
+        self.density[:] = 0.0
+        self.meas_seen = 0 # measurement_history frames already added to the raster
+        self.trails = {} # track id -> [(2 * trail_length, 2) buffer, points used]
+        for line in self.lines:
+            line.set_data([], [])
+
+    # Ages the raster by one frame and adds that frame's returns
+    def _add_returns(self, meas):
+        self.density *= self.decay
+        meas = np.asarray(meas, dtype=float).reshape(-1, 2)
+        if len(meas) == 0:
+            return
+        cells = ((meas + self.max_range) * (self.bins / (2.0 * self.max_range))).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < self.bins), axis=1)
+        cells = cells[inside]
+        np.add.at(self.density, (cells[:, 1], cells[:, 0]), 1.0)
+
+    # Appends a point to a trail, the buffer holds twice the window so the last trail_length points are always one
+    # contiguous slice and the window only slides back to the front once every trail_length points
+    def _append(self, trail, point):
+        buf, used = trail
+        if used == len(buf):
+            keep = self.trail_length - 1
+            buf[:keep] = buf[used - keep:used]
+            used = keep
+        buf[used] = point
+        trail[1] = used + 1
+
+    def _trail_points(self, trail):
+        buf, used = trail
+        return buf[max(0, used - self.trail_length):used]
+
+    # Takes in whatever the history gained since the last call, then redraws
+    # Returns the frame as an (H, W, 4) image that stays valid until the next update
+    def update(self, frame, history=None):
+        if history is None:
+            history = frame
+        meas_history = history.get("measurement_history", [])
+        if len(meas_history) < self.meas_seen:
+            self.clear() # History was reset under us
+
+        for meas in meas_history[self.meas_seen:]:
+            self._add_returns(meas)
+        self.meas_seen = len(meas_history)
+        self.image.set_data(self.density)
+
+        filt = np.asarray(frame.get("filtered_positions", []), dtype=float).reshape(-1, 2)
+        truth = np.asarray(frame.get("truth_positions", []), dtype=float).reshape(-1, 2)
+        ids = [int(i) for i in frame.get("track_ids", range(len(filt)))]
+
+        # Trails are kept per track id and follow each track's own estimates, so a trail and its estimate always share
+        # a colour (history rows can't be used for this, under track management they are slots that change owner)
+        for k, track_id in enumerate(ids):
+            self._append(self.trails.setdefault(track_id, [np.empty((2 * self.trail_length, 2)), 0]), filt[k])
+
+        # Tracks that are gone take their trails with them
+        for track_id in self.trails.keys() - set(ids):
+            del self.trails[track_id]
+
+        while len(self.lines) < len(ids):
+            line, = self.ax.plot([], [], linewidth=2, alpha=0.7, zorder=3, animated=True)
+            self.lines.append(line)
+        for k, line in enumerate(self.lines):
+            if k < len(ids):
+                points = self._trail_points(self.trails[ids[k]])
+                line.set_data(points[:, 0], points[:, 1])
+                line.set_color(track_color(ids[k]))
+            else:
+                line.set_data([], [])
+
+        self.filtered.set_offsets(filt)
+        self.filtered.set_facecolor([track_color(i) for i in ids])
+        self.truth.set_offsets(truth)
+        self.truth_only.set_offsets(truth)
+
+        return self.draw()
+
+    def draw(self):
+        canvas = self.fig.canvas
+        if self._background is None or self._background_size != canvas.get_width_height():
+            canvas.draw() # Animated artists are skipped here, this renders only the static parts
+            self._background = canvas.copy_from_bbox(self.fig.bbox)
+            self._background_size = canvas.get_width_height()
+
+        canvas.restore_region(self._background)
+        self.ax.draw_artist(self.image)
+        for line in self.lines:
+            self.ax.draw_artist(line)
+        self.ax.draw_artist(self.truth)
+        self.ax.draw_artist(self.filtered)
+        self.truth_ax.draw_artist(self.truth_only)
+        canvas.blit(self.fig.bbox)
+        return np.asarray(canvas.buffer_rgba())
@@ -0,0 +1,104 @@
+# Global Nearest Neighbor association: every track gets at most one measurement and no measurement is shared
+# (solves the whole frame as one assignment problem instead of letting each track grab its own closest return)
+
+import numpy as np
+from Gating import cluster_tracks
+
+# Minimum cost assignment of rows to columns (shortest augmenting path Hungarian / Jonker-Volgenant style)
+# Works on rectangular matrices and returns (row indices, column indices) like scipy's linear_sum_assignment
+def linear_assignment(cost):
+    cost = np.asarray(cost, dtype=float)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+
+    u = np.zeros(n + 1) # Row potentials
+    v = np.zeros(m + 1) # Column potentials
+    p = np.zeros(m + 1, dtype=np.int64) # p[j] = row (1-based) currently assigned to column j, 0 means free
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        # Grow the alternating tree one column at a time until a free column is reached (inner loop over columns is vectorized)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            used_cols = np.flatnonzero(used)
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        # Flip the augmenting path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    cols = np.flatnonzero(p[1:])
+    rows = p[1:][cols] - 1
+    if transposed:
+        rows, cols = cols, rows
+    order = np.argsort(rows)
+    return rows[order], cols[order]
+
+class GlobalNearestNeighborAssociate:
+    def __init__(self, gate_threshold):
+        self.miss_cost = float(gate_threshold) # Cost of leaving a track without a measurement (a return right on the gate edge is worth the same)
+
+    # Returns, for every track, the index of the measurement it was given (-1 when it gets none)
+    def assign(self, gate_matrix, dists):
+        gate_matrix = np.asarray(gate_matrix, dtype=bool)
+        assignment = np.full(gate_matrix.shape[0], -1, dtype=np.int64)
+
+        # Tracks that share no gated measurements can be solved independently (and usually are tiny problems)
+        for tracks, meas in cluster_tracks(gate_matrix):
+            if len(meas) == 0:
+                continue
+            if len(tracks) == 1 and len(meas) == 1:
+                assignment[tracks[0]] = meas[0]
+                continue
+
+            sub_gate = gate_matrix[np.ix_(tracks, meas)]
+            sub_cost = dists[np.ix_(tracks, meas)]
+            forbidden = (self.miss_cost + 1.0) * (len(tracks) + 1)
+            n = len(tracks)
+
+            # [ real costs | one private "no measurement" column per track ]
+            cost = np.full((n, len(meas) + n), forbidden)
+            cost[:, :len(meas)] = np.where(sub_gate, sub_cost, forbidden)
+            cost[np.arange(n), len(meas) + np.arange(n)] = self.miss_cost
+
+            rows, cols = linear_assignment(cost)
+            real = (cols < len(meas)) & sub_gate[rows, np.minimum(cols, len(meas) - 1)]
+            assignment[tracks[rows[real]]] = meas[cols[real]]
+
+        return assignment
+
+    # Frame level association used by RealtrackerEngine: one solve per frame instead of one call per track
+    def associate_frame(self, predicted_z, measurements, gate_matrix, dists, S=None):
+        assignment = self.assign(gate_matrix, dists)
+        has_meas = assignment >= 0
+
+        z_bars = np.zeros((len(assignment), 2))
+        z_bars[has_meas] = measurements[assignment[has_meas]]
+
+        return z_bars, has_meas, assignment
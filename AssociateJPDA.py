@@ -0,0 +1,106 @@
+# Joint Probabilistic Data Association (PDA that knows about the other tracks)
+# Tracks sharing gated measurements are grouped into clusters and their association probabilities are computed jointly,
+# so a return between two crossing targets is no longer counted in full by both of them
+
+import numpy as np
+from Gating import cluster_tracks, gate_distances
+
+# Exact marginal association probabilities for one cluster by enumerating every feasible joint event
+# ratios[t, j] is the likelihood ratio of track t taking measurement j (0 outside the gate), miss_weight is the weight of a missed detection
+def _enumerate_betas(ratios, miss_weight):
+    n, m = ratios.shape
+
+    hyps = np.zeros((1, 0), dtype=np.int64) # Measurement picked by each track so far (-1 = missed)
+    weights = np.ones(1)
+    used = np.zeros((1, m), dtype=bool)
+
+    # Extend every partial hypothesis by one track at a time (vectorized over hypotheses)
+    for t in range(n):
+        new_hyps = [np.column_stack((hyps, np.full(len(hyps), -1)))]
+        new_weights = [weights * miss_weight]
+        new_used = [used]
+        for j in np.flatnonzero(ratios[t] > 0):
+            free = ~used[:, j]
+            if not np.any(free):
+                continue
+            new_hyps.append(np.column_stack((hyps[free], np.full(free.sum(), j))))
+            new_weights.append(weights[free] * ratios[t, j])
+            taken = used[free].copy()
+            taken[:, j] = True
+            new_used.append(taken)
+        hyps = np.concatenate(new_hyps)
+        weights = np.concatenate(new_weights)
+        used = np.concatenate(new_used)
+
+    weights = weights / weights.sum()
+    betas = np.zeros((n, m))
+    for t in range(n):
+        picked = hyps[:, t] >= 0
+        np.add.at(betas[t], hyps[picked, t], weights[picked])
+    return betas
+
+# Cheap JPDA (Fitzgerald) approximation, used when a cluster is too dense to enumerate
+def _cheap_betas(ratios, miss_weight):
+    track_sums = ratios.sum(axis=1, keepdims=True)
+    meas_sums = ratios.sum(axis=0, keepdims=True)
+    betas = ratios / (track_sums + meas_sums - ratios + miss_weight)
+
+    # Keep each track's probabilities (including "missed") summing to one
+    totals = betas.sum(axis=1, keepdims=True)
+    return np.where(totals > 1.0, betas / np.maximum(totals, 1e-300), betas)
+
+# Works on a single cluster so clusters can be farmed out to an executor
+def jpda_cluster(predicted_z, S, measurements, gated, pd, clutter_density, max_hypotheses):
+    diff = measurements[np.newaxis, :, :] - predicted_z[:, np.newaxis, :]
+    S_inv = np.linalg.inv(S)
+    d2 = gate_distances(diff, S_inv[:, np.newaxis, :, :])**2
+
+    # Likelihood ratio of each (track, measurement) pair against clutter
+    norm = 2 * np.pi * np.sqrt(np.linalg.det(S))
+    ratios = np.where(gated, pd * np.exp(-0.5 * d2) / (norm[:, np.newaxis] * clutter_density), 0.0)
+    miss_weight = 1.0 - pd
+
+    # Upper bound on the number of joint events (each track picks "missed" or one of its gated measurements)
+    num_events = np.prod(1.0 + gated.sum(axis=1))
+    if num_events <= max_hypotheses:
+        return _enumerate_betas(ratios, miss_weight)
+    return _cheap_betas(ratios, miss_weight)
+
+class JointProbabilisticDataAssociation:
+    def __init__(self, pd=0.9, clutter_density=1e-6, max_hypotheses=10000, executor=None):
+        self.pd = pd # Probability of detection
+        self.clutter_density = clutter_density # Expected false alarms per unit area
+        self.max_hypotheses = max_hypotheses # Clusters with more joint events than this use cheap JPDA instead
+        self.executor = executor # Optional concurrent.futures executor for spreading clusters over workers
+
+    # Returns (N, M) association probabilities for the frame, the rest of each row is the "missed" probability
+    def betas(self, predicted_z, measurements, gate_matrix, S):
+        gate_matrix = np.asarray(gate_matrix, dtype=bool)
+        betas = np.zeros(gate_matrix.shape)
+
+        clusters = [(tracks, meas) for tracks, meas in cluster_tracks(gate_matrix) if len(meas) > 0]
+        jobs = [
+            (predicted_z[tracks], S[tracks], measurements[meas], gate_matrix[np.ix_(tracks, meas)],
+             self.pd, self.clutter_density, self.max_hypotheses)
+            for tracks, meas in clusters
+        ]
+
+        if self.executor is not None:
+            results = self.executor.map(jpda_cluster, *zip(*jobs)) if jobs else []
+        else:
+            results = (jpda_cluster(*job) for job in jobs)
+
+        for (tracks, meas), cluster_betas in zip(clusters, results):
+            betas[np.ix_(tracks, meas)] = cluster_betas
+        return betas
+
+    # Frame level association used by RealtrackerEngine
+    # The fused measurement keeps the predicted position for the "missed" share, so the Kalman update sees the JPDA combined innovation
+    def associate_frame(self, predicted_z, measurements, gate_matrix, dists, S):
+        betas = self.betas(predicted_z, measurements, gate_matrix, S)
+        beta0 = 1.0 - betas.sum(axis=1)
+        has_meas = np.any(gate_matrix, axis=1)
+
+        z_bars = betas @ measurements + beta0[:, np.newaxis] * predicted_z
+
+        return z_bars, has_meas, betas
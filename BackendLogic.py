@@ -1,9 +1,18 @@
 # Backend logic (majority of it already completed in other python files)
 # Tells what types of values we should expect to input, API logic, and step/reset activations
 
-from fastapi import FastAPI 
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel 
 from RealTrackerEngine import RealtrackerEngine
+from FrameCodec import encode_frame, MEDIA_TYPE
+from SessionRegistry import SessionRegistry
+from Metrics import render_prometheus, PROMETHEUS_MEDIA_TYPE
+from Streaming import FrameBroadcaster
+import asyncio
+import numpy as np
+import os
+import time
 import traceback
 
 # Creates web server
@@ -17,57 +26,139 @@ class Config(BaseModel):
     range_ref: float  
     lambda_clutter: float 
     gate_threshold: float 
+    gate_metric: str = "euclidean"
+    gating_backend: str = "brute"
     process_noise: float
     measurement_noise: float
     max_range: float 
-
-# Store the latest configuration 
-current_config: Config | None = None
-
-# Our global variable holding our RealtrackerEngine object  --> Global so we dont constantly restart from frame = 0   
-engine: RealtrackerEngine | None = None
-
+    seed: int | None = None
+    num_frames: int | None = 100 # None = endless, streaming only
+    streaming: bool = False
+    math_backend: str = "python"
+    cpp_threads: int = 1
+    scenario_path: str | None = None
+    log_path: str | None = None
+    log_format: str | None = None
+    log_frame_period: float | None = None
+    track_management: bool = False
+    max_tracks: int = 256
+    confirm_m: int = 2
+    confirm_n: int = 3
+    max_misses: int = 3
+    history_window: int = 1000
+    metrics: bool = True
+
+# Files a client may name (log_path, scenario_path) are looked up inside this server-side directory only, never anywhere else
+# Unset = clients cannot open files at all
+DATA_DIR = os.environ.get("RADAR_DATA_DIR")
+
+# Turns the client's file names into absolute paths under DATA_DIR, raises ValueError for anything outside it
+def resolve_data_paths(cfg):
+    for field in ("log_path", "scenario_path"):
+        name = cfg.get(field)
+        if not name:
+            continue
+        if DATA_DIR is None:
+            raise ValueError(f"{field} is disabled on this server (RADAR_DATA_DIR is not set)")
+        root = os.path.realpath(DATA_DIR)
+        path = os.path.realpath(os.path.join(root, name))
+        if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+            raise ValueError(f"{field} must name a file inside the server's data directory")
+        cfg[field] = path
+    return cfg
+
+# Binary responses are picked with ?format=binary or an Accept header naming the binary media type
+def wants_binary(request: Request, format: str | None):
+    if format is not None:
+        return format == "binary"
+    accept = request.headers.get("accept", "")
+    return MEDIA_TYPE in accept or "application/octet-stream" in accept
+
+def binary_response(arrays, precision: int, metrics=None):
+    float_dtype = np.float32 if precision == 32 else np.float64
+    start = time.perf_counter_ns()
+    content = encode_frame(arrays, float_dtype)
+    if metrics is not None:
+        metrics.observe("serialize", time.perf_counter_ns() - start)
+    return Response(content=content, media_type=MEDIA_TYPE)
+
+# Every client gets its own session (config + engine), replacing the old single global engine
+registry = SessionRegistry()
+
+def session_error(session_id):
+    return {"error": f"Unknown or expired session: {session_id}"}
+
+# Stores the configuration for a session, creating a new session when no (known) id is given
 @app.post("/configure")
-def configure_simulation(config: Config):
-    global current_config
-    current_config = config
-    return {"status": "ok", "message": "Configuration stored"}
+def configure_simulation(config: Config, session_id: str | None = None):
+    try:
+        resolve_data_paths(config.model_dump())
+    except ValueError as e:
+        return {"error": str(e)}
+
+    session = registry.get(session_id) if session_id is not None else None
+    if session is None:
+        session = registry.create(config)
+    else:
+        with session.lock:
+            session.config = config
+    return {"status": "ok", "message": "Configuration stored", "session_id": session.session_id}
 
 # Allows the simulation to restart (reset) with new input parameters
 @app.get("/reset")
-def reset_simulation():
-    global engine, current_config
+def reset_simulation(session_id: str | None = None):
+    if session_id is None:
+        return {"error": "No configuration provided yet"}
 
-    print("RESET CALLED. current_config =", current_config)
+    session = registry.get(session_id)
+    if session is None:
+        return session_error(session_id)
 
-    if current_config is None:
-        return {"error": "No configuration provided yet"}
+    print("RESET CALLED. session =", session_id, "config =", session.config)
 
     try:
-        cfg = current_config.model_dump()
-        print("CONFIG DICT:", cfg)
+        with session.lock:
+            cfg = resolve_data_paths(session.config.model_dump())
+            print("CONFIG DICT:", cfg)
 
-        engine = RealtrackerEngine(cfg)
-        print("ENGINE CREATED:", engine)
+            if session.broadcaster is not None:
+                session.broadcaster.stop() # Viewers of the old run get its end event
+                session.broadcaster = None
+            if session.engine is not None:
+                session.engine.close()
+            session.engine = RealtrackerEngine(cfg)
+            print("ENGINE CREATED:", session.engine)
 
-        return {"status": "ok", "message": "Simulation reset"}
+        return {"status": "ok", "message": "Simulation reset", "session_id": session_id}
 
     except Exception as e:
         print("ENGINE FAILED:", e)
         return {"error": f"Engine failed to initialize: {e}"}
     # A bunch of error checks for when sim was breaking down or I was receiving weird error messages
 
+# Drops a session and its engine right away instead of waiting for the idle timeout
+@app.delete("/session")
+def close_session(session_id: str):
+    if not registry.remove(session_id):
+        return session_error(session_id)
+    return {"status": "ok", "message": "Session closed"}
+
 
 # Goes through the timesteps of the simulation, giving an output for each "step" (effectively animiating the simulation)
 @app.get("/step")
-def step_simulation():
-    global engine
+def step_simulation(request: Request, session_id: str, format: str | None = None, precision: int = 64):
+    session = registry.get(session_id)
+    if session is None:
+        return session_error(session_id)
 
-    if engine is None:
+    if session.engine is None:
         return {"error": "Simulation not initialized"}
 
     try:
-        frame = engine.step()
+        with session.lock:
+            if wants_binary(request, format):
+                return binary_response(session.engine.advance(), precision, session.engine.metrics)
+            frame = session.engine.step()
         return frame
     except Exception as e:
         print("\n--- BACKEND STEP CRASH ---")
@@ -78,3 +169,57 @@ def step_simulation():
 
 # Similar to the first, a bunch of error checks for debugging
 
+# Pushes frames as Server-Sent Events instead of one /step request per frame, the session steps itself at `fps`
+# Any number of viewers can watch one session, a viewer that falls behind skips frames (fill gaps with /history)
+@app.get("/stream")
+async def stream_simulation(session_id: str, fps: float = 20.0):
+    session = await asyncio.to_thread(registry.get, session_id) # May close evicted sessions, which can block
+    if session is None:
+        return session_error(session_id)
+
+    if session.engine is None:
+        return {"error": "Simulation not initialized"}
+
+    if session.broadcaster is None:
+        session.broadcaster = FrameBroadcaster(session, fps=fps)
+    else:
+        session.broadcaster.fps = fps # Latest viewer sets the pace
+    subscriber = session.broadcaster.subscribe()
+
+    return StreamingResponse(
+        session.broadcaster.events(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Returns the track and measurement history for frames [start, stop), so /step only has to send the newest frame
+@app.get("/history")
+def history_simulation(request: Request, session_id: str, start: int = 0, stop: int | None = None, format: str | None = None, precision: int = 64):
+    session = registry.get(session_id)
+    if session is None:
+        return session_error(session_id)
+
+    if session.engine is None:
+        return {"error": "Simulation not initialized"}
+
+    try:
+        with session.lock:
+            if wants_binary(request, format):
+                return binary_response(session.engine.history_arrays(start, stop), precision)
+            return session.engine.history(start, stop)
+    except Exception as e:
+        print("\n--- BACKEND HISTORY CRASH ---")
+        print("Error:", e)
+        traceback.print_exc()
+        print("---------------------------\n")
+        return {"error": f"Backend crashed: {e}"}
+
+# Per-stage timings, frame rates and track/measurement counts of every live session, in Prometheus text format
+@app.get("/metrics")
+def export_metrics():
+    series = [
+        ({"session": session.session_id}, session.engine.metrics)
+        for session in registry.sessions()
+        if session.engine is not None and session.engine.metrics is not None
+    ]
+    return Response(content=render_prometheus(series), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -0,0 +1,161 @@
+# Monte Carlo batch runner: sweeps a parameter grid over a list of seeds and runs RealtrackerEngine headless
+# on a process pool, writing one compact row (RMSE, track loss rate, runtime per frame) per (parameters, seed) run
+#
+# Example:
+#   python BatchRunner.py --grid gate_threshold=20,40,60 --grid lambda_clutter=25,100 --seeds 0-49 --out results.csv
+
+import argparse
+import ast
+import csv
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from RealTrackerEngine import RealtrackerEngine
+from AssociateGNN import linear_assignment
+
+# Same defaults the frontend sends
+DEFAULT_CONFIG = {
+    "num_objects": 3,
+    "association_method": "PDA",
+    "sigma_base": 45.0,
+    "range_ref": 5000.0,
+    "lambda_clutter": 25.0,
+    "gate_threshold": 40.0,
+    "process_noise": 1.0,
+    "measurement_noise": 30.0,
+    "max_range": 10000.0
+}
+
+RESULT_FIELDS = ["seed", "rmse", "track_loss_rate", "ms_per_frame", "frames"]
+
+# Runs one seeded scenario to the end and returns its summary row
+# A track counts as lost when its final estimate is more than loss_distance away from the truth (or it has none)
+def run_scenario(config, seed, loss_distance=100.0):
+    # Every run uses a fresh seed, so caching the scenario would only hold memory
+    config = dict(config, seed=seed, record_history=False, scenario_cache=False)
+    engine = RealtrackerEngine(config)
+
+    if engine.num_frames is None:
+        raise ValueError("Batch runs need a finite num_frames (num_frames=None streams forever)")
+    managed = config.get("track_management", False)
+
+    sq_error = 0.0
+    matched = 0 # Truth positions that had an estimate, the RMSE is taken over these
+    elapsed_ns = 0
+    final_error = np.zeros(engine.num_objects)
+    for _ in range(engine.num_frames):
+        start = time.perf_counter_ns()
+        frame = engine.advance()
+        elapsed_ns += time.perf_counter_ns() - start
+
+        if managed:
+            final_error = _matched_error(frame["filtered_positions"], frame["truth_positions"])
+        else:
+            diff = frame["filtered_positions"] - frame["truth_positions"]
+            final_error = np.sqrt(np.sum(diff * diff, axis=1))
+        found = np.isfinite(final_error)
+        sq_error += float(np.sum(final_error[found] ** 2))
+        matched += int(np.count_nonzero(found))
+
+    frames = max(engine.num_frames, 1)
+    return {
+        "seed": seed,
+        "rmse": np.sqrt(sq_error / matched) if matched else float("nan"),
+        "track_loss_rate": float(np.mean(final_error > loss_distance)) if engine.num_objects else 0.0,
+        "ms_per_frame": elapsed_ns / frames / 1e6,
+        "frames": engine.num_frames
+    }
+
+# Under track management the confirmed tracks come in any number and order, so each truth position is paired with
+# at most one estimate (minimum total distance), truth left without an estimate gets an infinite error (lost)
+def _matched_error(estimates, truth):
+    error = np.full(len(truth), np.inf)
+    if len(estimates) == 0 or len(truth) == 0:
+        return error
+    distance = np.sqrt(np.sum((truth[:, np.newaxis, :] - estimates[np.newaxis, :, :]) ** 2, axis=2))
+    rows, cols = linear_assignment(distance)
+    error[rows] = distance[rows, cols]
+    return error
+
+def _run_job(job):
+    params, config, seed, loss_distance = job
+    row = dict(params)
+    row.update(run_scenario(config, seed, loss_distance))
+    return row
+
+# Every combination of the grid values, e.g. {"a": [1, 2], "b": [3]} -> [{"a": 1, "b": 3}, {"a": 2, "b": 3}]
+def expand_grid(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+def run_batch(grid, seeds, base_config=None, workers=None, loss_distance=100.0):
+    base_config = dict(DEFAULT_CONFIG if base_config is None else base_config)
+    jobs = [
+        (params, dict(base_config, **params), seed, loss_distance)
+        for params in expand_grid(grid)
+        for seed in seeds
+    ]
+
+    if workers == 1:
+        return [_run_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run_job, jobs, chunksize=max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))))
+
+def write_results(rows, path):
+    if not rows:
+        return
+    fields = [name for name in rows[0] if name not in RESULT_FIELDS] + RESULT_FIELDS
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+# One command line value as a Python literal (20, 0.5, True/true, None/null), anything else stays a string ("grid")
+def _parse_value(text):
+    for parse in (ast.literal_eval, json.loads):
+        try:
+            return parse(text)
+        except (ValueError, SyntaxError):
+            continue
+    return text
+
+# "a=1,2,3" -> ("a", [1, 2, 3])
+def _parse_grid_arg(text):
+    name, _, values = text.partition("=")
+    return name, [_parse_value(v.strip()) for v in values.split(",") if v]
+
+# "0-9" -> 0..9, "1,5,7" -> [1, 5, 7]
+def _parse_seeds(text):
+    if "-" in text:
+        lo, hi = text.split("-", 1)
+        return list(range(int(lo), int(hi) + 1))
+    return [int(s) for s in text.split(",") if s]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run seeded tracking scenarios over a parameter grid")
+    parser.add_argument("--grid", action="append", default=[], help="name=v1,v2,... (repeatable)")
+    parser.add_argument("--seeds", default="0-9", help="seed range 'a-b' or list 'a,b,c'")
+    parser.add_argument("--set", action="append", default=[], help="fixed override name=value (repeatable)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: every core)")
+    parser.add_argument("--loss-distance", type=float, default=100.0, help="final error that counts as a lost track")
+    parser.add_argument("--out", default="batch_results.csv")
+    args = parser.parse_args(argv)
+
+    base_config = dict(DEFAULT_CONFIG)
+    for item in args.set:
+        name, values = _parse_grid_arg(item)
+        base_config[name] = values[0]
+    grid = dict(_parse_grid_arg(item) for item in args.grid)
+    seeds = _parse_seeds(args.seeds)
+
+    start = time.perf_counter()
+    rows = run_batch(grid, seeds, base_config, args.workers, args.loss_distance)
+    write_results(rows, args.out)
+    print(f"{len(rows)} runs written to {args.out} in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+# Python vs C++ (tracker_cpp) benchmark suite for the tracking kernels, with scaling sweeps and equivalence checks
+# Every kernel is timed per implementation over a sweep of track counts and clutter levels on seeded synthetic
+# scenes, its output is checked against the pure Python reference, and results go to JSON + CSV plus scaling plots
+#
+# Usage:
+#   python Benchmark.py                                    (full sweep: 1-10k tracks, lambda_clutter 10-10k)
+#   python Benchmark.py --tracks 1,10,100 --clutter 10,100 --repeats 3 --out bench
+#   python Benchmark.py --baseline bench/results.json      (exit code 1 when a kernel got slower than the baseline)
+
+import argparse
+import csv
+import json
+import os
+import platform
+import time
+
+import numpy as np
+from KalmanMath import KalmanMath, KalmanBank
+from Gating import Gate, GridGate
+from AssociateNN import NearestNeighborAssociate
+from AssociatePDA import ProbabilisticDataAssociation
+
+try:
+    import tracker_cpp  # Optional C++ acceleration module (built from cpp/)
+except ImportError:
+    tracker_cpp = None
+
+MAP_SIZE = 2500.0
+MEAS_SIGMA = 10.0 # Spread of each track's own detection around its prediction
+GATE_THRESHOLD = 50.0
+PROCESS_NOISE = 1.0
+MEASUREMENT_NOISE = 30.0
+MAX_BATCH_PAIRS = 20_000_000 # gate_batch materialises (N, M, 2) arrays, larger sweeps skip it
+
+RESULT_FIELDS = [
+    "kernel", "impl", "num_tracks", "lambda_clutter", "num_measurements",
+    "median_ns", "ns_per_track", "max_abs_diff", "equivalent", "skipped"
+]
+
+# Seeded synthetic scene: predicted track positions, one detection per track plus lambda_clutter uniform clutter points
+class Scene:
+    def __init__(self, num_tracks, lambda_clutter, seed):
+        rng = np.random.default_rng([seed, num_tracks, lambda_clutter])
+        self.num_tracks = num_tracks
+        self.lambda_clutter = lambda_clutter
+
+        self.x = np.zeros((num_tracks, 4))
+        self.x[:, :2] = rng.uniform(-MAP_SIZE, MAP_SIZE, size=(num_tracks, 2))
+        self.x[:, 2:] = rng.normal(0, 10, size=(num_tracks, 2))
+        A = rng.normal(size=(num_tracks, 4, 4))
+        self.P = 10 * A @ A.transpose(0, 2, 1) + 100 * np.eye(4) # Random SPD covariances
+
+        self.predicted = self.x[:, :2].copy()
+        self.detections = self.predicted + rng.normal(0, MEAS_SIGMA, size=(num_tracks, 2))
+        clutter = rng.uniform(-MAP_SIZE, MAP_SIZE, size=(lambda_clutter, 2))
+        self.measurements = np.ascontiguousarray(np.concatenate((self.detections, clutter)))
+
+        # Gated sets from the reference gate, the input of the association kernels
+        gate = Gate(GATE_THRESHOLD)
+        self.gated = [
+            np.ascontiguousarray(np.asarray(gate.gate_measurement(z, self.measurements)[0], dtype=float).reshape(-1, 2))
+            for z in self.predicted
+        ]
+
+def _template():
+    return KalmanMath(1.0, PROCESS_NOISE, MEASUREMENT_NOISE)
+
+# ---------------------------------------------------------
+# Kernel implementations: each one is (setup, run) where setup(scene) builds fresh inputs outside the timed
+# region and run(state) is the timed call, returning an output comparable with the Python reference
+# ---------------------------------------------------------
+
+def _filters(scene):
+    filters = []
+    for i in range(scene.num_tracks):
+        kf = _template()
+        kf.x = scene.x[i].reshape(4, 1).copy()
+        kf.P = scene.P[i].copy()
+        filters.append(kf)
+    return filters
+
+def _bank(scene):
+    bank = KalmanBank(scene.num_tracks, 1.0, PROCESS_NOISE, MEASUREMENT_NOISE)
+    bank.x[:] = scene.x
+    bank.P[:] = scene.P
+    return bank
+
+def _fortran(scene):
+    kf = _template()
+    # Always copies: the C++ calls write x and P in place and must never touch the scene
+    xs = [np.array(scene.x[i].reshape(4, 1), order="F") for i in range(scene.num_tracks)]
+    Ps = [np.array(scene.P[i], order="F") for i in range(scene.num_tracks)]
+    zs = [np.array(scene.detections[i].reshape(2, 1), order="F") for i in range(scene.num_tracks)]
+    mats = {name: np.asfortranarray(getattr(kf, name).astype(float)) for name in ("F", "Q", "H", "R")}
+    return xs, Ps, zs, mats
+
+def _stack_filters(filters):
+    return np.array([kf.x[:, 0] for kf in filters]), np.array([kf.P for kf in filters])
+
+def _stack_fortran(xs, Ps):
+    return np.array([x[:, 0] for x in xs]), np.array(Ps)
+
+def _py_predict(filters):
+    for kf in filters:
+        kf.predict()
+    return _stack_filters(filters)
+
+def _py_update(args):
+    filters, z = args
+    for kf, zi in zip(filters, z):
+        kf.update(zi)
+    return _stack_filters(filters)
+
+def _bank_predict(bank):
+    bank.predict()
+    return bank.x, bank.P
+
+def _bank_update(args):
+    bank, z = args
+    bank.update(z)
+    return bank.x, bank.P
+
+def _cpp_predict(args):
+    xs, Ps, _, mats = args
+    for x, P in zip(xs, Ps):
+        tracker_cpp.kalman_predict(x, P, mats["F"], mats["Q"])
+    return _stack_fortran(xs, Ps)
+
+def _cpp_update(args):
+    xs, Ps, zs, mats = args
+    for x, P, z in zip(xs, Ps, zs):
+        tracker_cpp.kalman_update(x, P, z, mats["H"], mats["R"])
+    return _stack_fortran(xs, Ps)
+
+# Gating outputs are the gated points of every track back to back, plus per-track counts
+def _gate_output(gated_sets):
+    counts = np.array([len(g) for g in gated_sets])
+    points = np.concatenate([np.asarray(g, dtype=float).reshape(-1, 2) for g in gated_sets]) if gated_sets else np.zeros((0, 2))
+    return counts, points
+
+def _py_gate(scene):
+    gate = Gate(GATE_THRESHOLD)
+    return _gate_output([gate.gate_measurement(z, scene.measurements)[0] for z in scene.predicted])
+
+def _batch_gate(scene, gate_class=Gate):
+    gate_matrix, _ = gate_class(GATE_THRESHOLD).gate_batch(scene.predicted, scene.measurements)
+    return _gate_output([scene.measurements[row] for row in gate_matrix])
+
+def _grid_gate(scene):
+    return _batch_gate(scene, GridGate)
+
+def _cpp_gate(scene):
+    meas = scene.measurements
+    return _gate_output([meas[tracker_cpp.gate_measurements(meas, z, GATE_THRESHOLD)] for z in scene.predicted])
+
+# Association outputs are one fused / chosen measurement per track (NaN where nothing was gated)
+def _py_nn(scene):
+    assoc = NearestNeighborAssociate()
+    out = np.full((scene.num_tracks, 2), np.nan)
+    for i, (z, gated) in enumerate(zip(scene.predicted, scene.gated)):
+        choice, _ = assoc.choose(z, gated)
+        if choice is not None:
+            out[i] = choice
+    return out
+
+def _cpp_nn(scene):
+    S = np.eye(2) # Identity S makes the C++ distance the same Euclidean one the Python associator uses
+    out = np.full((scene.num_tracks, 2), np.nan)
+    for i, (z, gated) in enumerate(zip(scene.predicted, scene.gated)):
+        idx = tracker_cpp.associate_nn(gated, z, S)
+        if idx != -1:
+            out[i] = gated[idx]
+    return out
+
+def _pda_R():
+    return MEASUREMENT_NOISE**2 * np.eye(2)
+
+def _py_pda(scene):
+    assoc = ProbabilisticDataAssociation(_pda_R())
+    out = np.full((scene.num_tracks, 2), np.nan)
+    for i, (z, gated) in enumerate(zip(scene.predicted, scene.gated)):
+        z_bar, _ = assoc.choose(z, gated)
+        if z_bar is not None:
+            out[i] = z_bar
+    return out
+
+def _cpp_pda(scene):
+    R = _pda_R()
+    out = np.full((scene.num_tracks, 2), np.nan)
+    for i, (z, gated) in enumerate(zip(scene.predicted, scene.gated)):
+        if len(gated):
+            out[i] = tracker_cpp.associate_pda(gated, z, R).z_fused
+    return out
+
+def _same(scene):
+    return scene
+
+# kernel -> (sweeps clutter?, [(impl, setup, run, needs_cpp)]), the first implementation is the reference
+KERNELS = {
+    "kalman_predict": (False, [
+        ("python", _filters, _py_predict, False),
+        ("python_batched", _bank, _bank_predict, False),
+        ("cpp", _fortran, _cpp_predict, True)
+    ]),
+    "kalman_update": (False, [
+        ("python", lambda s: (_filters(s), s.detections), _py_update, False),
+        ("python_batched", lambda s: (_bank(s), s.detections), _bank_update, False),
+        ("cpp", _fortran, _cpp_update, True)
+    ]),
+    "gate": (True, [
+        ("python", _same, _py_gate, False),
+        ("python_batched", _same, _batch_gate, False),
+        ("python_grid", _same, _grid_gate, False),
+        ("cpp", _same, _cpp_gate, True)
+    ]),
+    "associate_nn": (True, [
+        ("python", _same, _py_nn, False),
+        ("cpp", _same, _cpp_nn, True)
+    ]),
+    "associate_pda": (True, [
+        ("python", _same, _py_pda, False),
+        ("cpp", _same, _cpp_pda, True)
+    ])
+}
+
+# ---------------------------------------------------------
+# Timing and equivalence
+# ---------------------------------------------------------
+
+def _time(setup, run, scene, repeats):
+    times = []
+    out = None
+    for _ in range(repeats):
+        state = setup(scene)
+        start = time.perf_counter_ns()
+        out = run(state)
+        times.append(time.perf_counter_ns() - start)
+    return int(np.median(times)), out
+
+# Largest difference between two outputs (tuples of arrays), inf when their shapes disagree
+def _max_abs_diff(a, b):
+    a = a if isinstance(a, tuple) else (a,)
+    b = b if isinstance(b, tuple) else (b,)
+    worst = 0.0
+    for x, y in zip(a, b):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.shape != y.shape or not np.array_equal(np.isnan(x), np.isnan(y)):
+            return float("inf")
+        if x.size:
+            worst = max(worst, float(np.nanmax(np.abs(x - y) / np.maximum(1.0, np.abs(y)))))
+    return worst
+
+def _skipped(kernel, impl, num_tracks, lambda_clutter, num_meas, reason):
+    return {
+        "kernel": kernel, "impl": impl, "num_tracks": num_tracks, "lambda_clutter": lambda_clutter,
+        "num_measurements": num_meas, "median_ns": None, "ns_per_track": None,
+        "max_abs_diff": None, "equivalent": None, "skipped": reason
+    }
+
+def run_benchmarks(kernels, tracks, clutter, repeats=5, seed=0, rtol=1e-9, log=print):
+    rows = []
+    for kernel in kernels:
+        sweeps_clutter, impls = KERNELS[kernel]
+        for num_tracks in tracks:
+            for lambda_clutter in (clutter if sweeps_clutter else [0]):
+                scene = Scene(num_tracks, lambda_clutter, seed)
+                num_meas = len(scene.measurements)
+                reference = None
+                for impl, setup, run, needs_cpp in impls:
+                    if needs_cpp and tracker_cpp is None:
+                        rows.append(_skipped(kernel, impl, num_tracks, lambda_clutter, num_meas, "tracker_cpp not built"))
+                        continue
+                    if impl == "python_batched" and kernel == "gate" and num_tracks * num_meas > MAX_BATCH_PAIRS:
+                        rows.append(_skipped(kernel, impl, num_tracks, lambda_clutter, num_meas, "too many pairs"))
+                        continue
+
+                    median_ns, out = _time(setup, run, scene, repeats)
+                    if reference is None:
+                        reference = out
+                    diff = _max_abs_diff(out, reference)
+                    rows.append({
+                        "kernel": kernel, "impl": impl, "num_tracks": num_tracks, "lambda_clutter": lambda_clutter,
+                        "num_measurements": num_meas, "median_ns": median_ns, "ns_per_track": median_ns / num_tracks,
+                        "max_abs_diff": diff, "equivalent": diff <= rtol, "skipped": ""
+                    })
+                    log(f"{kernel:15s} {impl:15s} N={num_tracks:<6d} clutter={lambda_clutter:<6d} "
+                        f"{median_ns / 1e6:10.3f} ms  diff={diff:.2e}")
+    return rows
+
+# ---------------------------------------------------------
+# Output
+# ---------------------------------------------------------
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "tracker_cpp": tracker_cpp is not None,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+def write_results(rows, out_dir, settings):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "results.json"), "w") as f:
+        json.dump({"environment": environment(), "settings": settings, "results": rows}, f, indent=2)
+    with open(os.path.join(out_dir, "results.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+# One figure per kernel: time per frame against track count (at the largest clutter level) and, for the
+# clutter-swept kernels, against lambda_clutter (at the largest track count), log-log, one line per implementation
+def plot_results(rows, out_dir):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    timed = [r for r in rows if r["median_ns"] is not None]
+    for kernel in dict.fromkeys(r["kernel"] for r in timed):
+        kernel_rows = [r for r in timed if r["kernel"] == kernel]
+        sweeps_clutter = KERNELS[kernel][0]
+        fig, axes = plt.subplots(1, 2 if sweeps_clutter else 1, figsize=(12 if sweeps_clutter else 6, 4.5), squeeze=False)
+
+        views = [("num_tracks", "lambda_clutter", "Tracks")]
+        if sweeps_clutter:
+            views.append(("lambda_clutter", "num_tracks", "lambda_clutter"))
+        for ax, (x_field, fixed_field, label) in zip(axes[0], views):
+            fixed = max(r[fixed_field] for r in kernel_rows)
+            for impl in dict.fromkeys(r["impl"] for r in kernel_rows):
+                points = sorted((r[x_field], r["median_ns"] / 1e6) for r in kernel_rows
+                                if r["impl"] == impl and r[fixed_field] == fixed)
+                if points:
+                    xs, ys = zip(*points)
+                    ax.plot(xs, ys, marker="o", label=impl)
+            ax.set_xscale("log")
+            ax.set_yscale("log")
+            ax.set_xlabel(label)
+            ax.set_ylabel("Time per call (ms)")
+            ax.set_title(f"{kernel} ({fixed_field}={fixed})")
+            ax.grid(True, which="both", alpha=0.3)
+            ax.legend()
+
+        fig.tight_layout()
+        fig.savefig(os.path.join(out_dir, f"{kernel}.png"), dpi=120)
+        plt.close(fig)
+
+# Rows that got slower than the baseline by more than tolerance (as a fraction), matched on kernel/impl/sizes
+def compare_baseline(rows, baseline_rows, tolerance=0.25):
+    key = lambda r: (r["kernel"], r["impl"], r["num_tracks"], r["lambda_clutter"])
+    baseline = {key(r): r for r in baseline_rows if r["median_ns"] is not None}
+    regressions = []
+    for row in rows:
+        old = baseline.get(key(row))
+        if old is None or row["median_ns"] is None:
+            continue
+        ratio = row["median_ns"] / old["median_ns"]
+        if ratio > 1 + tolerance:
+            regressions.append((row, ratio))
+    return regressions
+
+def _parse_list(text):
+    return [int(v) for v in text.split(",") if v]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python and C++ tracking kernels")
+    parser.add_argument("--kernels", default=",".join(KERNELS), help="comma separated subset of " + ", ".join(KERNELS))
+    parser.add_argument("--tracks", default="1,10,100,1000,10000", help="track counts to sweep")
+    parser.add_argument("--clutter", default="10,100,1000,10000", help="lambda_clutter values to sweep")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per point (the median is kept)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rtol", type=float, default=1e-9, help="largest relative difference counted as equivalent")
+    parser.add_argument("--out", default="benchmark_results", help="directory for results.json, results.csv and plots")
+    parser.add_argument("--no-plots", action="store_true")
+    parser.add_argument("--baseline", help="earlier results.json to check for slowdowns")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    kernels = [k for k in args.kernels.split(",") if k]
+    unknown = [k for k in kernels if k not in KERNELS]
+    if unknown:
+        parser.error(f"unknown kernels: {', '.join(unknown)}")
+    settings = {"kernels": kernels, "tracks": _parse_list(args.tracks), "clutter": _parse_list(args.clutter),
+                "repeats": args.repeats, "seed": args.seed, "rtol": args.rtol}
+
+    start = time.perf_counter()
+    rows = run_benchmarks(kernels, settings["tracks"], settings["clutter"], args.repeats, args.seed, args.rtol)
+    write_results(rows, args.out, settings)
+    if not args.no_plots:
+        plot_results(rows, args.out)
+    print(f"{len(rows)} results written to {args.out} in {time.perf_counter() - start:.1f} s")
+
+    failed = [r for r in rows if r["equivalent"] is False]
+    for r in failed:
+        print(f"NOT EQUIVALENT: {r['kernel']} {r['impl']} N={r['num_tracks']} clutter={r['lambda_clutter']} diff={r['max_abs_diff']:.2e}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_baseline(rows, json.load(f)["results"], args.tolerance)
+        for r, ratio in regressions:
+            print(f"SLOWER: {r['kernel']} {r['impl']} N={r['num_tracks']} clutter={r['lambda_clutter']} x{ratio:.2f}")
+
+    if failed or regressions:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Binary encoding for frames and history sent by the backend (skips JSON for the big float arrays)
+#
+# Layout:  b"RTF1" | uint32 header length | JSON header | padding | array buffers (each 8-byte aligned)
+# The header holds the plain scalar fields plus the name, dtype, shape and byte offset of every array
+
+import json
+import struct
+import numpy as np
+
+MAGIC = b"RTF1"
+MEDIA_TYPE = "application/x-radar-frame"
+
+def _align(n, alignment=8):
+    return (n + alignment - 1) // alignment * alignment
+
+# float_dtype lets callers trade precision for size (float32 halves the payload)
+def encode_frame(frame, float_dtype=np.float64):
+    scalars = {}
+    arrays = []
+    for name, value in frame.items():
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind == "f":
+                value = value.astype(float_dtype, copy=False)
+            arrays.append((name, np.ascontiguousarray(value)))
+        elif isinstance(value, np.generic):
+            scalars[name] = value.item()
+        else:
+            scalars[name] = value
+
+    # Work out where each buffer lives relative to the start of the data section
+    specs = []
+    offset = 0
+    for name, arr in arrays:
+        specs.append({"name": name, "dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset})
+        offset = _align(offset + arr.nbytes)
+
+    header = json.dumps({"scalars": scalars, "arrays": specs}).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header))
+
+    out = bytearray(data_start + offset)
+    out[:4] = MAGIC
+    out[4:8] = struct.pack("<I", len(header))
+    out[8:8 + len(header)] = header
+    for spec, (_, arr) in zip(specs, arrays):
+        start = data_start + spec["offset"]
+        out[start:start + arr.nbytes] = arr.tobytes()
+    return bytes(out)
+
+# Arrays come back as read-only views straight over the payload (no copies)
+def decode_frame(payload):
+    payload = memoryview(payload)
+    if bytes(payload[:4]) != MAGIC:
+        raise ValueError("Not a binary radar frame")
+    (header_len,) = struct.unpack("<I", payload[4:8])
+    header = json.loads(bytes(payload[8:8 + header_len]).decode("utf-8"))
+    data_start = _align(8 + header_len)
+
+    frame = dict(header["scalars"])
+    for spec in header["arrays"]:
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        arr = np.frombuffer(payload, dtype=dtype, count=count, offset=data_start + spec["offset"])
+        frame[spec["name"]] = arr.reshape(spec["shape"])
+    return frame
+
+# Splits the packed measurement history of a decoded /history payload back into one array per frame
+def split_measurement_history(history):
+    offsets = history["measurement_offsets"]
+    if len(offsets) < 2:
+        return []
+    return np.split(history["measurement_history"], offsets[1:-1])
@@ -0,0 +1,268 @@
+# Frame sources feed RealtrackerEngine one frame of measurements at a time
+# A source is iterable over (timestamp, measurements (M, 2)) pairs and can optionally provide truth and
+# starting positions, so generated scenarios, recorded scenario files and real radar logs all run the same pipeline
+
+import itertools
+import os
+from abc import ABC, abstractmethod
+import queue
+import threading
+import warnings
+import numpy as np
+
+# Subclasses must implement __iter__ and initial_positions, an incomplete one fails when it is constructed
+class FrameSource(ABC):
+    num_objects = None # Number of tracks the engine should run
+    num_frames = None # None when the length is not known up front (e.g. a log being read)
+
+    @abstractmethod
+    def __iter__(self):
+        ...
+
+    # Truth positions (num_objects, 2) for frame t, or None when there is no ground truth
+    def truth(self, t):
+        return None
+
+    # Starting positions (num_objects, 2) for the tracks
+    @abstractmethod
+    def initial_positions(self):
+        ...
+
+    def close(self):
+        pass
+
+# Frames already packed in memory (or memory mapped from a scenario file) plus their truth trajectories
+class PackedFrameSource(FrameSource):
+    def __init__(self, trajectory, frames, dt=1.0):
+        self.trajectory = trajectory
+        self.frames = frames
+        self.dt = dt
+        self.num_objects = trajectory.shape[0]
+        self.num_frames = trajectory.shape[1]
+
+    def __iter__(self):
+        for t in range(self.num_frames):
+            yield t * self.dt, self.frames.frame(t)
+
+    def truth(self, t):
+        return self.trajectory[:, t, :]
+
+    def initial_positions(self):
+        return self.trajectory[:, 0, :]
+
+# Frames generated lazily (RadarModel.iter_frames) against known truth trajectories
+class StreamFrameSource(FrameSource):
+    def __init__(self, trajectory, frame_iter, dt=1.0):
+        self.trajectory = trajectory
+        self.frame_iter = frame_iter
+        self.dt = dt
+        self.num_objects = trajectory.shape[0]
+        self.num_frames = trajectory.shape[1]
+
+    def __iter__(self):
+        for t, frame in enumerate(self.frame_iter):
+            yield t * self.dt, frame
+
+    def truth(self, t):
+        return self.trajectory[:, t, :]
+
+    def initial_positions(self):
+        return self.trajectory[:, 0, :]
+
+# Frames generated lazily against a TargetMotion, whose truth is computed per frame (runs without an end too)
+class MotionFrameSource(StreamFrameSource):
+    def __init__(self, motion, frame_iter, dt=1.0):
+        self.motion = motion
+        self.frame_iter = frame_iter
+        self.dt = dt
+        self.num_objects = motion.num_objects
+        self.num_frames = motion.num_frames # None = endless
+
+    def truth(self, t):
+        return self.motion.at(t)
+
+    def initial_positions(self):
+        return self.motion.at(0)
+
+# Runs an iterator on a background thread, at most maxsize items ahead of the consumer
+# The producer blocks once the queue is full, so a slow consumer holds memory constant instead of piling up frames
+class Prefetcher:
+    _DONE = object()
+
+    def __init__(self, iterable, maxsize=8):
+        self._queue = queue.Queue(maxsize)
+        self._stop = threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(target=self._run, args=(iterable,), daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self, iterable):
+        try:
+            for item in iterable:
+                if not self._put(item):
+                    return
+            self._put(self._DONE)
+        except BaseException as e:
+            # Hand the error to the consumer so it surfaces where the frames are used
+            self._put(e)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # Timed waits so a consumer blocked here also notices close() from another thread
+        while True:
+            if self._finished:
+                raise StopIteration
+            try:
+                item = self._queue.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        if item is self._DONE:
+            self._finished = True
+            raise StopIteration
+        if isinstance(item, BaseException):
+            self._finished = True
+            raise item
+        return item
+
+    def close(self):
+        self._stop.set()
+        self._finished = True
+        # Free a blocked producer, then wait for it to notice the stop flag
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            self._queue.put_nowait(self._DONE) # Wakes a consumer that is waiting right now
+        except queue.Full:
+            pass
+        self._thread.join(timeout=1.0)
+        if self._thread.is_alive():
+            # Stuck inside the source (e.g. a slow read), it exits on its own at the next item since _put sees the stop
+            # flag, and being a daemon thread it never keeps the process alive
+            warnings.warn("Prefetch thread did not stop within 1 s, leaving it to finish in the background", RuntimeWarning)
+
+# Record layout of binary logs, one record per radar plot
+LOG_DTYPE = np.dtype([("timestamp", "<f8"), ("x", "<f8"), ("y", "<f8")])
+
+# Reads a log in chunks of chunk_rows plots, yielding (timestamps (K,), positions (K, 2)) blocks
+def _read_csv_chunks(path, chunk_rows, columns=(0, 1, 2)):
+    with open(path, "r") as f:
+        first = f.readline()
+        lines = [] if not first or not _is_numeric_row(first) else [first] # Skip a header row
+        while True:
+            lines.extend(itertools.islice(f, chunk_rows - len(lines)))
+            if not lines:
+                return
+            rows = np.loadtxt(lines, delimiter=",", usecols=columns, ndmin=2, dtype=float)
+            yield rows[:, 0], rows[:, 1:3]
+            lines = []
+
+def _is_numeric_row(line):
+    try:
+        float(line.split(",")[0])
+        return True
+    except ValueError:
+        return False
+
+def _read_binary_chunks(path, chunk_rows, dtype=LOG_DTYPE):
+    with open(path, "rb") as f:
+        while True:
+            records = np.fromfile(f, dtype=dtype, count=chunk_rows)
+            if len(records) == 0:
+                return
+            yield records["timestamp"].astype(float), np.column_stack((records["x"], records["y"])).astype(float)
+
+# Regroups plot blocks into frames: plots sharing a timestamp form one frame, or with frame_period set,
+# plots falling in the same scan period do (empty scans come out as empty frames so the filter keeps stepping)
+def group_frames(chunks, frame_period=None):
+    pending = []
+    pending_key = None
+    pending_time = None
+    for times, positions in chunks:
+        if len(times) == 0:
+            continue
+        keys = times if frame_period is None else np.floor(times / frame_period)
+        if np.any(keys[1:] < keys[:-1]) or (pending_key is not None and keys[0] < pending_key):
+            raise ValueError("Log timestamps must be non-decreasing")
+
+        breaks = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        for start, stop in zip(np.r_[0, breaks], np.r_[breaks, len(keys)]):
+            key = keys[start]
+            if pending_key is not None and key != pending_key:
+                yield pending_time, np.concatenate(pending)
+                if frame_period is not None:
+                    for missing in range(int(pending_key) + 1, int(key)):
+                        yield missing * frame_period, np.zeros((0, 2))
+                pending = []
+            if not pending:
+                pending_key = key
+                pending_time = times[start] if frame_period is None else key * frame_period
+            pending.append(positions[start:stop])
+
+    if pending:
+        yield pending_time, np.concatenate(pending)
+
+# Real radar plots from a CSV (timestamp,x,y per row) or binary (LOG_DTYPE records) log
+# The log is parsed in bulk chunk by chunk on a prefetch thread, never held in memory as a whole
+class LogFrameSource(FrameSource):
+    def __init__(self, path, num_objects, format=None, chunk_rows=65536, frame_period=None, prefetch=8, start_positions=None):
+        if format is None:
+            format = "csv" if os.path.splitext(path)[1].lower() in (".csv", ".txt") else "binary"
+        if format not in ("csv", "binary"):
+            raise ValueError(f"Unknown log format: {format}")
+
+        self.path = path
+        self.format = format
+        self.num_objects = num_objects
+        self.chunk_rows = chunk_rows
+        self.frame_period = frame_period
+        self.prefetch = prefetch
+        self.start_positions = start_positions
+        self._prefetcher = None
+
+    def _frames(self):
+        if self.format == "csv":
+            chunks = _read_csv_chunks(self.path, self.chunk_rows)
+        else:
+            chunks = _read_binary_chunks(self.path, self.chunk_rows)
+        return group_frames(chunks, self.frame_period)
+
+    def __iter__(self):
+        self.close()
+        if self.prefetch > 0:
+            self._prefetcher = Prefetcher(self._frames(), maxsize=self.prefetch)
+            return self._prefetcher
+        return self._frames()
+
+    # Without known starting positions, tracks start on the first frame's plots (zeros if there are too few)
+    def initial_positions(self):
+        if self.start_positions is not None:
+            return np.asarray(self.start_positions, dtype=float).reshape(self.num_objects, 2)
+
+        positions = np.zeros((self.num_objects, 2))
+        frames = self._frames()
+        first = next(frames, None)
+        frames.close()
+        if first is not None:
+            plots = first[1][:self.num_objects]
+            positions[:len(plots)] = plots
+        return positions
+
+    def close(self):
+        if self._prefetcher is not None:
+            self._prefetcher.close()
+            self._prefetcher = None
@@ -2,9 +2,23 @@
 
 import numpy as np
 
+# Distance between each innovation and zero, written out term by term so every gating backend gets bit-identical values
+def gate_distances(diff, S_inv=None):
+    dx = diff[..., 0]
+    dy = diff[..., 1]
+    if S_inv is None:
+        return np.sqrt(dx * dx + dy * dy) # Euclidean
+
+    a = S_inv[..., 0, 0]
+    b = S_inv[..., 0, 1] + S_inv[..., 1, 0]
+    c = S_inv[..., 1, 1]
+    d2 = a * dx * dx + b * dx * dy + c * dy * dy # Mahalanobis
+    return np.sqrt(np.maximum(d2, 0.0))
+
 class Gate:
-    def __init__(self, gate_threshold):
+    def __init__(self, gate_threshold, metric="euclidean"):
         self.gate_threshold = gate_threshold
+        self.metric = metric # "euclidean" or "mahalanobis" (used by gate_batch)
         
     def gate_measurement(self, predicted_z, measurements):
         if measurements is None or len(measurements) == 0:
@@ -13,9 +27,144 @@ class Gate:
         diff = measurements - predicted_z 
         dists = np.linalg.norm(diff, axis=1) # Magnitude of the distances
         
-        gated = []
-        for meas, dist in zip(measurements, dists): 
-            if dist <= self.gate_threshold:
-                gated.append(meas) # Loops through each measurment, keeping only measurements in range
+        gated = measurements[dists <= self.gate_threshold] # Keeps only measurements in range
+
+        return gated, dists.tolist() # Passed position measurements (measurements within reasonable range) and distances for all measurements
+
+    def _inverse_S(self, S):
+        if self.metric != "mahalanobis":
+            return None
+        if S is None:
+            raise ValueError("Mahalanobis gating needs the per-track innovation covariances S")
+        return np.linalg.inv(S)
+
+    # Gates every track against every measurement of a frame in one broadcasted computation
+    # predicted_z is (N, 2), measurements is (M, 2) and S is an optional (N, 2, 2) stack of innovation covariances
+    # Returns an (N, M) boolean gate matrix and the (N, M) distance matrix it was built from
+    def gate_batch(self, predicted_z, measurements, S=None):
+        predicted_z = np.asarray(predicted_z, dtype=float).reshape(-1, 2)
+        measurements = np.asarray(measurements, dtype=float).reshape(-1, 2)
+        S_inv = self._inverse_S(S)
+
+        diff = measurements[np.newaxis, :, :] - predicted_z[:, np.newaxis, :] # (N, M, 2)
+        if S_inv is not None:
+            S_inv = S_inv[:, np.newaxis, :, :]
+        dists = gate_distances(diff, S_inv)
+
+        return dists <= self.gate_threshold, dists
+
+
+# Uniform grid over one frame's measurements, built once and then queried by every track
+# Cells are numbered row by row so each grid column covers one contiguous run of sorted keys
+class MeasurementGrid:
+    def __init__(self, measurements, cell_size):
+        self.measurements = np.asarray(measurements, dtype=float).reshape(-1, 2)
+        self.cell_size = float(cell_size)
+
+        if len(self.measurements) == 0:
+            self.origin = np.zeros(2, dtype=np.int64)
+            self.shape = np.zeros(2, dtype=np.int64)
+            self.order = np.zeros(0, dtype=np.int64)
+            self.sorted_keys = np.zeros(0, dtype=np.int64)
+            return
+
+        cells = np.floor(self.measurements / self.cell_size).astype(np.int64)
+        self.origin = cells.min(axis=0)
+        cells -= self.origin
+        self.shape = cells.max(axis=0) + 1
+
+        keys = cells[:, 0] * self.shape[1] + cells[:, 1]
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+
+    # Candidate measurement indices for every (center, radius) query, returned as (track index, measurement index) pairs
+    def query(self, centers, radii):
+        centers = np.asarray(centers, dtype=float).reshape(-1, 2)
+        radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(centers),))
+        empty = np.zeros(0, dtype=np.int64)
+        if len(self.order) == 0 or len(centers) == 0:
+            return empty, empty
+
+        lo = np.floor((centers - radii[:, np.newaxis]) / self.cell_size).astype(np.int64) - self.origin
+        hi = np.floor((centers + radii[:, np.newaxis]) / self.cell_size).astype(np.int64) - self.origin
+        lo = np.maximum(lo, 0)
+        hi = np.minimum(hi, self.shape - 1)
+        valid = np.all(lo <= hi, axis=1)
+        n_cols = np.where(valid, hi[:, 0] - lo[:, 0] + 1, 0)
+
+        # One contiguous key range per (track, grid column) pair
+        tracks = np.repeat(np.arange(len(centers)), n_cols)
+        col_start = np.cumsum(n_cols) - n_cols
+        cols = lo[tracks, 0] + np.arange(len(tracks)) - np.repeat(col_start, n_cols)
+        key_lo = cols * self.shape[1] + lo[tracks, 1]
+        key_hi = cols * self.shape[1] + hi[tracks, 1]
+        starts = np.searchsorted(self.sorted_keys, key_lo, side="left")
+        ends = np.searchsorted(self.sorted_keys, key_hi, side="right")
+
+        # Expand the ranges into flat index lists without a Python loop
+        lengths = ends - starts
+        pair_tracks = np.repeat(tracks, lengths)
+        run_start = np.cumsum(lengths) - lengths
+        positions = np.arange(lengths.sum()) - np.repeat(run_start, lengths) + np.repeat(starts, lengths)
+        return pair_tracks, self.order[positions]
+
+
+# Gate backed by a MeasurementGrid, so each track only measures distances to the cells its gate can reach
+# Gives the same gate matrix as Gate.gate_batch, distances outside the searched cells are reported as inf
+class GridGate(Gate):
+    def __init__(self, gate_threshold, metric="euclidean", cell_size=None):
+        super().__init__(gate_threshold, metric)
+        self.cell_size = cell_size # Defaults to the typical gate radius of the frame
+
+    def gate_batch(self, predicted_z, measurements, S=None):
+        predicted_z = np.asarray(predicted_z, dtype=float).reshape(-1, 2)
+        measurements = np.asarray(measurements, dtype=float).reshape(-1, 2)
+        S_inv = self._inverse_S(S)
+
+        # Radius of the circle that encloses each track's gate
+        if S_inv is None:
+            radii = np.full(len(predicted_z), float(self.gate_threshold))
+        else:
+            radii = self.gate_threshold * np.sqrt(np.linalg.eigvalsh(S)[:, -1])
+
+        gate_matrix = np.zeros((len(predicted_z), len(measurements)), dtype=bool)
+        dists = np.full(gate_matrix.shape, np.inf)
+        if gate_matrix.size == 0:
+            return gate_matrix, dists
+
+        cell_size = self.cell_size if self.cell_size is not None else np.median(radii)
+        grid = MeasurementGrid(measurements, max(cell_size, 1e-9))
+        track_idx, meas_idx = grid.query(predicted_z, radii)
+
+        diff = measurements[meas_idx] - predicted_z[track_idx]
+        pair_dists = gate_distances(diff, None if S_inv is None else S_inv[track_idx])
+        dists[track_idx, meas_idx] = pair_dists
+        gate_matrix[track_idx, meas_idx] = pair_dists <= self.gate_threshold
+
+        return gate_matrix, dists
+
+
+# Splits a gate matrix into independent clusters: groups of tracks linked through measurements they both gated
+# Returns a list of (track indices, measurement indices) pairs, tracks that gated nothing come back as their own cluster
+def cluster_tracks(gate_matrix):
+    gate_matrix = np.asarray(gate_matrix, dtype=bool)
+    num_tracks, num_meas = gate_matrix.shape
+    track_idx, meas_idx = np.nonzero(gate_matrix)
+
+    # Label propagation: every track and measurement ends up holding the smallest track index of its cluster
+    labels = np.arange(num_tracks)
+    while True:
+        meas_labels = np.full(num_meas, num_tracks)
+        np.minimum.at(meas_labels, meas_idx, labels[track_idx])
+        new_labels = labels.copy()
+        np.minimum.at(new_labels, track_idx, meas_labels[meas_idx])
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
 
-        return gated, dists.tolist() # Passed position measurements (measurements within reasonable range) and distances for all measurements
\ No newline at end of file
+    clusters = []
+    for label in np.unique(labels):
+        tracks = np.flatnonzero(labels == label)
+        meas = np.flatnonzero(meas_labels == label)
+        clusters.append((tracks, meas))
+    return clusters
@@ -0,0 +1,98 @@
+# Fixed-capacity ring buffers for the engine's history, so long sessions keep a flat memory profile
+# Both buffers are preallocated NumPy arrays indexed by absolute frame number, only the last `window` frames are kept
+# and reads copy out just the requested range (the only copies made are the ones that get serialized)
+
+import numpy as np
+
+# Measurements of the last `window` frames in one flat (capacity, 2) ring of points
+# A frame's points can wrap around the end of the ring, per-frame starts are absolute point counts
+# When the points of a long stretch of busy frames outgrow the ring, the oldest frames are dropped early
+class MeasurementRing:
+    def __init__(self, window, capacity=None):
+        self.window = window
+        self.capacity = window * 64 if capacity is None else capacity # Points, not frames
+        self.points = np.zeros((self.capacity, 2))
+        self.frame_start = np.zeros(window, dtype=np.int64) # Absolute index of each frame's first point
+        self.frame_len = np.zeros(window, dtype=np.int64)
+        self.first_frame = 0 # Oldest frame still held
+        self.num_frames = 0 # Frames appended so far (one past the newest)
+        self.total_points = 0 # Points appended so far
+
+    def __len__(self):
+        return self.num_frames - self.first_frame
+
+    def append(self, measurements):
+        n = len(measurements)
+        if n > self.capacity:
+            self._grow(n) # Only a single frame bigger than the whole ring ever allocates
+
+        pos = self.total_points % self.capacity
+        first = min(n, self.capacity - pos)
+        self.points[pos:pos + first] = measurements[:first]
+        self.points[:n - first] = measurements[first:]
+
+        slot = self.num_frames % self.window
+        self.frame_start[slot] = self.total_points
+        self.frame_len[slot] = n
+        self.total_points += n
+        self.num_frames += 1
+
+        # Drop frames that fell out of the window or whose points were overwritten
+        self.first_frame = max(self.first_frame, self.num_frames - self.window)
+        oldest_point = self.total_points - self.capacity
+        while self.first_frame < self.num_frames - 1 and self.frame_start[self.first_frame % self.window] < oldest_point:
+            self.first_frame += 1
+
+    def _grow(self, n):
+        # Points are placed by absolute index, so moving them is one wrapped gather and scatter
+        oldest = self.frame_start[self.first_frame % self.window] if len(self) else self.total_points
+        index = np.arange(oldest, self.total_points)
+        held = self.points[index % self.capacity]
+        self.capacity = max(n, 2 * self.capacity)
+        self.points = np.zeros((self.capacity, 2))
+        self.points[index % self.capacity] = held
+
+    # Frames [start, stop) clamped to what is still held, as (flat (K, 2) copy, offsets (k + 1,), start)
+    def read(self, start, stop):
+        start = min(max(start, self.first_frame), self.num_frames)
+        stop = max(min(stop, self.num_frames), start)
+
+        slots = np.arange(start, stop) % self.window
+        lengths = self.frame_len[slots]
+        offsets = np.zeros(len(slots) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(lengths)
+        if offsets[-1] == 0:
+            return np.zeros((0, 2)), offsets, start
+
+        # Absolute point index of every requested point, then wrap into the ring
+        begin = self.frame_start[slots[0]]
+        index = (begin + np.arange(offsets[-1])) % self.capacity
+        return self.points[index], offsets, start
+
+# Per-frame track positions of the last `window` frames in a preallocated (num_tracks, window, 2) ring
+class TrackRing:
+    def __init__(self, num_tracks, window):
+        self.window = window
+        self.positions = np.zeros((num_tracks, window, 2))
+        self.first_frame = 0
+        self.num_frames = 0
+
+    def __len__(self):
+        return self.num_frames - self.first_frame
+
+    # With rows given, positions belong to those tracks only and every other track gets NaN for this frame
+    def append(self, positions, rows=None):
+        column = self.num_frames % self.window
+        if rows is None:
+            self.positions[:, column] = positions
+        else:
+            self.positions[:, column] = np.nan
+            self.positions[rows, column] = positions
+        self.num_frames += 1
+        self.first_frame = max(self.first_frame, self.num_frames - self.window)
+
+    # Frames [start, stop) clamped to what is still held, as a (num_tracks, k, 2) copy
+    def read(self, start, stop):
+        start = min(max(start, self.first_frame), self.num_frames)
+        stop = max(min(stop, self.num_frames), start)
+        return self.positions[:, np.arange(start, stop) % self.window]
@@ -39,4 +39,63 @@ class KalmanMath:
     def S(self):
         return self.H @ self.P @ self.H.T + self.R
 
-        
\ No newline at end of file
+
+# Batched version of the Kalman equations above, holding every track in a single set of arrays
+# States are stored as (N, 4) and covariances as (N, 4, 4) so each step is a handful of NumPy calls instead of one per track
+class KalmanBank:
+    def __init__(self, num_tracks, dt, process_noise, measurement_noise):
+        self.dt = dt
+        self.x = np.zeros((num_tracks, 4))  # State vectors: [x, y, vx, vy] per track
+        self.P = np.tile(np.eye(4) * 1000, (num_tracks, 1, 1))  # Initial covariance matrices
+        self.F = np.array([[1, 0, dt, 0],
+                           [0, 1, 0, dt],
+                           [0, 0, 1, 0],
+                           [0, 0, 0, 1]])  # State transition matrix (shared by all tracks)
+        self.H = np.array([[1, 0, 0, 0],
+                           [0, 1, 0, 0]])  # Measurement matrix
+        self.Q = process_noise * np.array([[dt**4/4, 0, dt**3/2, 0],
+                                           [0, dt**4/4, 0, dt**3/2],
+                                           [dt**3/2, 0, dt**2, 0],
+                                           [0, dt**3/2, 0, dt**2]]) # Process noise covariance
+        self.R = measurement_noise * np.eye(2)  # Measurement noise covariance
+
+    @property
+    def num_tracks(self):
+        return self.x.shape[0]
+
+    def _rows(self, mask):
+        # Turns an optional boolean mask into the row indices it selects (None means every track)
+        if mask is None:
+            return slice(None)
+        return np.flatnonzero(mask)
+
+    def predict(self, mask=None):
+        # Predict the next state for every track (or only the masked ones)
+        rows = self._rows(mask)
+        self.x[rows] = self.x[rows] @ self.F.T
+        self.P[rows] = (self.F @ self.P[rows]) @ self.F.T + self.Q
+
+    def update(self, z, mask=None):
+        # z holds one measurement row per track, rows whose mask entry is False are left untouched
+        rows = self._rows(mask)
+        z = np.asarray(z, dtype=float).reshape(-1, 2)[rows]
+        x = self.x[rows]
+        P = self.P[rows]
+        if len(x) == 0:
+            return
+
+        y = z - x @ self.H.T
+        S = self.H @ P @ self.H.T + self.R
+        K = P @ self.H.T @ np.linalg.inv(S)
+
+        self.x[rows] = x + (K @ y[:, :, np.newaxis])[:, :, 0]
+        I = np.eye(4)
+        self.P[rows] = (I - K @ self.H) @ P
+
+    @property
+    def predicted_z(self):
+        return self.x @ self.H.T  # (N, 2) predicted measurements
+
+    @property
+    def S(self):
+        return self.H @ self.P @ self.H.T + self.R  # (N, 2, 2) innovation covariances
@@ -3,7 +3,7 @@ import matplotlib.pyplot as plt
 import time
 import random
 
-from RealPositionSimulation import objectTrajectory
+from RealPositionSimulation import generate_trajectories
 from RadarModel import RadarModel
 from KalmanMath import KalmanMath
 from Gating import Gate
@@ -20,7 +20,11 @@ from Visualizer import (
     plot_gating_frame
 )
 
-import tracker_cpp   # C++ module
+# For a proper Python vs C++ comparison with scaling sweeps and equivalence checks, see Benchmark.py
+try:
+    import tracker_cpp   # C++ module
+except ImportError:
+    tracker_cpp = None
 
 np.random.seed(42)
 random.seed(42) # Necessary to allow both C++ and Python engine to use the exact same starting metrics
@@ -31,6 +35,9 @@ random.seed(42) # Necessary to allow both C++ and Python engine to use the exact
 
 USE_CPP = False    # Set False to run pure Python version (True allows for performance comparisons)
 
+if USE_CPP and tracker_cpp is None:
+    raise ImportError("USE_CPP needs the tracker_cpp module (build it from cpp/)")
+
 # Alias C++ functions for dual testing feature (Python vs C++ for performance)
 if USE_CPP:
     kalman_predict = tracker_cpp.kalman_predict
@@ -42,7 +49,7 @@ if USE_CPP:
 # =========================================================
 # 1. Load true trajectories
 # =========================================================
-trajectory = objectTrajectory
+trajectory = generate_trajectories(seed=42)
 num_objects = trajectory.shape[0]
 num_frames = trajectory.shape[1]
 
@@ -122,37 +129,34 @@ for t in range(num_frames):
         kf = filters[i]        # C++-backed filter (when USE_CPP)
 
         # -------------------------------------------------
-        # PYTHON PREDICT TIMING (always measured)
-        # -------------------------------------------------
-        t_pred_py = time.time()
-        kf.predict()
-        predict_times_py.append(time.time() - t_pred_py)
-
-        # -------------------------------------------------
-        # 1. Predict
+        # 1. Predict (exactly once per object per frame)
         # -------------------------------------------------
         gate = Gate(gate_threshold=50)
 
         if USE_CPP:
-            # Convert to Fortran order for C++
-            xF = np.asfortranarray(kf.x)
-            PF = np.asfortranarray(kf.P)
-            FF = np.asfortranarray(kf.F)
-            QF = np.asfortranarray(kf.Q)
+            # Copies in Fortran order for C++ (np.array always copies, the filter itself stays untouched)
+            xF = np.array(kf.x, order="F")
+            PF = np.array(kf.P, order="F")
+            FF = np.asfortranarray(kf.F, dtype=float)
+            QF = np.asfortranarray(kf.Q, dtype=float)
 
             # --- C++ PREDICT TIMING ---
             t_pred_cpp = time.time()
             kalman_predict(xF, PF, FF, QF)
             predict_times_cpp.append(time.time() - t_pred_cpp)
 
-            # Copy results back into the Python filter
-            kf.x[:] = xF
-            kf.P[:] = PF
+        # PYTHON PREDICT TIMING (always measured, same starting state as the C++ call)
+        t_pred_py = time.time()
+        kf.predict()
+        predict_times_py.append(time.time() - t_pred_py)
 
-        else:
-            # Python predict (main filter)
-            kf.predict()
+        if USE_CPP:
+            print(f"Frame {t} Obj {i} | predict ||dx||={np.linalg.norm(xF - kf.x):.6e} | ||dP||_F={np.linalg.norm(PF - kf.P):.6e}")
 
+            # The C++ result drives the filter from here on
+            kf.x = np.array(xF)
+            kf.P = np.array(PF)
+        else:
             # No C++ timing in Python-only mode
             predict_times_cpp.append(0.0)
 
@@ -197,18 +201,18 @@ for t in range(num_frames):
         info = None
 
         if USE_CPP:
-            if ASSOCIATION_METHOD == "NN":
-                idx = associate_nn(gated, predicted_z, kf.S)
+            if ASSOCIATION_METHOD == "NN" and len(gated) > 0:
+                # Identity S gives the same Euclidean nearest neighbor the Python associator picks
+                idx = associate_nn(np.ascontiguousarray(gated, dtype=float), predicted_z, np.eye(2))
                 z_bar = gated[idx] if idx != -1 else None
                 info = None
 
-            elif ASSOCIATION_METHOD == "PDA":
+            elif ASSOCIATION_METHOD == "PDA" and len(gated) > 0:
+                # Same R as the Python associator so both engines fuse identically
                 result = associate_pda(
-                    gated,
+                    np.ascontiguousarray(gated, dtype=float),
                     predicted_z,
-                    kf.R,
-                    gate.gate_threshold,
-                    radar.lambda_clutter
+                    associator.R
                 )
                 z_bar = result.z_fused
                 info = result.betas
@@ -235,36 +239,36 @@ for t in range(num_frames):
             update_times_cpp.append(0.0)
         else:
             if USE_CPP:
-                # Convert everything to Fortran order for C++
-                zF = np.asfortranarray(np.asarray(z_bar).reshape(2, 1))
-                HF = np.asfortranarray(kf.H)
-                RF = np.asfortranarray(kf.R)
-                xF = np.asfortranarray(kf.x)
-                PF = np.asfortranarray(kf.P)
+                # Fortran order copies for C++, so the C++ and Python updates start from the same state
+                zF = np.array(np.asarray(z_bar, dtype=float).reshape(2, 1), order="F")
+                HF = np.asfortranarray(kf.H, dtype=float)
+                RF = np.asfortranarray(kf.R, dtype=float)
+                xF = np.array(kf.x, order="F")
+                PF = np.array(kf.P, order="F")
 
                 # C++ UPDATE TIMING 
                 t_up_cpp = time.time()
                 kalman_update(xF, PF, zF, HF, RF)
                 update_times_cpp.append(time.time() - t_up_cpp)
 
-                # Copying results back into the Python filter
-                kf.x[:] = xF
-                kf.P[:] = PF
-
                 # PYTHON UPDATE TIMING
                 t_up_py = time.time()
                 kf.update(z_bar)
                 update_times_py.append(time.time() - t_up_py)
 
                 # Compare C++ vs Python filter states
-                dx = kf.x - kf.x
-                dP = kf.P - kf.P
+                dx = xF - kf.x
+                dP = PF - kf.P
                 print(
                     f"Frame {t} Obj {i} | "
                     f"||dx||={np.linalg.norm(dx):.6e} | "
                     f"||dP||_F={np.linalg.norm(dP):.6e}"
                 )
 
+                # The C++ result drives the filter from here on
+                kf.x = np.array(xF)
+                kf.P = np.array(PF)
+
             else:
                 # PYTHON UPDATE TIMING
                 t_up_py = time.time()
@@ -274,8 +278,8 @@ for t in range(num_frames):
                 # No C++ update in Python-only mode
                 update_times_cpp.append(0.0)
 
-            # Total update time (pipeline metric)
-            update_times.append(update_times_py[-1] + update_times_cpp[-1])
+            # Update time of the engine that drives the filter (pipeline metric)
+            update_times.append(update_times_cpp[-1] if USE_CPP else update_times_py[-1])
 
         # -------------------------------------------------
         # Innovation + diagnostics
@@ -0,0 +1,115 @@
+# Low overhead instrumentation for the tracking pipeline: per-stage latency histograms, frame rate and counts
+# Timings come from perf_counter_ns and go into fixed buckets (no per-frame allocation), rendered in the
+# Prometheus text format for the backend's /metrics endpoint. Engines without metrics skip all of this.
+
+import time
+from bisect import bisect_left
+
+# Bucket upper bounds in nanoseconds, 1 us to 1 s
+BUCKETS_NS = (
+    1_000, 2_500, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 500_000,
+    1_000_000, 2_500_000, 5_000_000, 10_000_000, 25_000_000, 50_000_000,
+    100_000_000, 250_000_000, 500_000_000, 1_000_000_000
+)
+
+STAGES = ("predict", "gate", "associate", "update", "lifecycle", "cpp_step", "serialize")
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS_NS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # Last entry is the +Inf bucket
+        self.sum_ns = 0
+        self.count = 0
+
+    def observe(self, ns):
+        self.counts[bisect_left(self.buckets, ns)] += 1
+        self.sum_ns += ns
+        self.count += 1
+
+    # (upper bound in seconds, cumulative count) pairs, ending with +Inf
+    def cumulative(self):
+        total = 0
+        out = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            out.append((bound / 1e9, total))
+        return out
+
+# Times consecutive stages of one frame, each lap() closes the stage that just ran
+class StageClock:
+    __slots__ = ("metrics", "last")
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.last = time.perf_counter_ns()
+
+    def lap(self, stage):
+        now = time.perf_counter_ns()
+        self.metrics.stages[stage].observe(now - self.last)
+        self.last = now
+
+class PipelineMetrics:
+    def __init__(self, rate_smoothing=0.1):
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.frames_total = 0
+        self.measurements_total = 0
+        self.tracks = 0 # Tracks reported on the last frame
+        self.live_tracks = 0 # Slots in use on the last frame (tentative + confirmed under track management)
+        self.frame_rate = 0.0 # Frames per second, exponentially smoothed over the gaps between frames
+        self.rate_smoothing = rate_smoothing
+        self._last_frame_ns = None
+
+    def clock(self):
+        return StageClock(self)
+
+    def observe(self, stage, ns):
+        self.stages[stage].observe(ns)
+
+    def frame(self, num_measurements, num_tracks, live_tracks=None):
+        now = time.perf_counter_ns()
+        if self._last_frame_ns is not None and now > self._last_frame_ns:
+            rate = 1e9 / (now - self._last_frame_ns)
+            self.frame_rate = rate if self.frames_total == 1 else self.frame_rate + self.rate_smoothing * (rate - self.frame_rate)
+        self._last_frame_ns = now
+        self.frames_total += 1
+        self.measurements_total += num_measurements
+        self.tracks = num_tracks
+        self.live_tracks = num_tracks if live_tracks is None else live_tracks
+
+def _labels(labels):
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+# Renders (labels dict, PipelineMetrics) pairs (e.g. one per session) as one Prometheus exposition
+def render_prometheus(metrics_by_labels):
+    lines = [
+        "# HELP radar_stage_seconds Time spent in each tracking pipeline stage per frame",
+        "# TYPE radar_stage_seconds histogram"
+    ]
+    for labels, metrics in metrics_by_labels:
+        for stage, hist in metrics.stages.items():
+            if hist.count == 0:
+                continue
+            stage_labels = _labels(dict(labels, stage=stage))
+            for bound, total in hist.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'radar_stage_seconds_bucket{{{stage_labels},le="{le}"}} {total}')
+            lines.append(f"radar_stage_seconds_sum{{{stage_labels}}} {hist.sum_ns / 1e9}")
+            lines.append(f"radar_stage_seconds_count{{{stage_labels}}} {hist.count}")
+
+    simple = (
+        ("radar_frames_total", "counter", "Frames processed", "frames_total"),
+        ("radar_measurements_total", "counter", "Measurements processed", "measurements_total"),
+        ("radar_tracks", "gauge", "Tracks reported on the last frame", "tracks"),
+        ("radar_live_tracks", "gauge", "Track slots in use on the last frame", "live_tracks"),
+        ("radar_frame_rate", "gauge", "Smoothed frames per second", "frame_rate")
+    )
+    for name, kind, help_text, attr in simple:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, metrics in metrics_by_labels:
+            series = f"{name}{{{_labels(labels)}}}" if labels else name
+            lines.append(f"{series} {getattr(metrics, attr)}")
+
+    return "\n".join(lines) + "\n"
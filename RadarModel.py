@@ -1,5 +1,32 @@
 import numpy as np
 
+# Every measurement of a scenario packed into one array, frame t lives in measurements[offsets[t]:offsets[t + 1]]
+# labels holds the index of the object that produced each measurement, or -1 for clutter
+class PackedFrames:
+    def __init__(self, measurements, offsets, labels):
+        self.measurements = measurements # (K, 2)
+        self.offsets = offsets # (num_frames + 1,)
+        self.labels = labels # (K,)
+
+    @property
+    def num_frames(self):
+        return len(self.offsets) - 1
+
+    def __len__(self):
+        return self.num_frames
+
+    def frame(self, t):
+        return self.measurements[self.offsets[t]:self.offsets[t + 1]]
+
+    def frame_labels(self, t):
+        return self.labels[self.offsets[t]:self.offsets[t + 1]]
+
+    # Ragged list of per-frame arrays (views, no copies), the format simulate_all_frames has always returned
+    def to_list(self):
+        if self.num_frames == 0:
+            return []
+        return np.split(self.measurements, self.offsets[1:-1])
+
 class RadarModel:
     def __init__(self, radar_pos = np.array([0.0, 0.0]), max_range = 3000, sigma_base = 20, range_ref = 7500, lambda_clutter = 25):
         self.radar_pos = radar_pos
@@ -10,7 +37,7 @@ class RadarModel:
      
     # Geometry Functions   
     def compute_range(self, position):
-        return np.linalg.norm(position - self.radar_pos)
+        return np.linalg.norm(position - self.radar_pos, axis=-1)
 
     def compute_radial_velocity(self, velocity, position):
         r_vec = position - self.radar_pos
@@ -23,10 +50,8 @@ class RadarModel:
 
     # Detection Model
     def detection_probability(self, r, P_Max = 0.95, k=2):
-        if r > self.max_range:
-            return 0.0
-        else:
-            return P_Max * (1 - (r / self.max_range)**k)
+        # Works on a single range or a whole array of ranges
+        return np.where(r > self.max_range, 0.0, P_Max * (1 - (r / self.max_range)**k))
 
     # Probability of detection ACTUALLY being detected for realism
     def is_detected(self, r):
@@ -63,13 +88,87 @@ class RadarModel:
             
         return np.array(measurement)
 
-    def simulate_all_frames(self, trajectory, mapSize):
+    # Vectorized scenario generator: detections, range dependent noise and clutter for every (object, frame) pair at once
+    # rng is a seeded np.random.Generator for reproducible runs (None falls back to the global np.random state)
+    def simulate_packed(self, trajectory, mapSize, rng=None):
+        rng = np.random if rng is None else rng
         numObjects, totalTime, _ = trajectory.shape
-        all_frames = []
-        
-        for t in range(totalTime):
-            positions = trajectory[:, t, :]
-            frame = self.simulate_frame(positions, mapSize)
-            all_frames.append(frame)
-            
-        return all_frames
+
+        # True detections (frame major, so within a frame objects keep their order)
+        ranges = self.compute_range(trajectory) # (numObjects, totalTime)
+        detected = rng.random((numObjects, totalTime)) < self.detection_probability(ranges)
+        det_t, det_obj = np.nonzero(detected.T)
+        sigma = self.sigma_range(ranges[det_obj, det_t])
+        det_meas = trajectory[det_obj, det_t] + rng.normal(0, 1, size=(len(det_t), 2)) * sigma[:, np.newaxis]
+
+        # Clutter
+        clutter_counts = rng.poisson(self.lambda_clutter, totalTime)
+        clutter_t = np.repeat(np.arange(totalTime), clutter_counts)
+        clutter = rng.uniform(-mapSize, mapSize, size=(len(clutter_t), 2))
+
+        # Stable sort by frame keeps each frame's detections ahead of its clutter
+        frame_idx = np.concatenate((det_t, clutter_t))
+        order = np.argsort(frame_idx, kind="stable")
+        measurements = np.concatenate((det_meas, clutter))[order]
+        labels = np.concatenate((det_obj, np.full(len(clutter_t), -1)))[order]
+        offsets = np.zeros(totalTime + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(frame_idx, minlength=totalTime))
+
+        return PackedFrames(measurements, offsets, labels)
+
+    def simulate_all_frames(self, trajectory, mapSize, rng=None):
+        return self.simulate_packed(trajectory, mapSize, rng).to_list()
+
+    # Chunk number `chunk` of a scenario (frames chunk*chunk_size onward), drawn from its own seed
+    # so any chunk can be regenerated on its own and in any order
+    # trajectory is either a (N, T, 2) array or a TargetMotion (RealPositionSimulation), which is evaluated per chunk
+    def simulate_chunk(self, trajectory, mapSize, seed, chunk, chunk_size=1):
+        start = chunk * chunk_size
+        rng = np.random.default_rng([seed, chunk])
+        if hasattr(trajectory, "chunk"):
+            stop = start + chunk_size if trajectory.num_frames is None else min(start + chunk_size, trajectory.num_frames)
+            truth = trajectory.chunk(start, stop)
+        else:
+            truth = trajectory[:, start:start + chunk_size]
+        return self.simulate_packed(truth, mapSize, rng)
+
+    # Lazy frame source: yields one frame at a time and only ever holds a single chunk in memory
+    # Frames are a deterministic function of (seed, chunk_size), stop=None runs until the trajectory ends
+    # (never, for a TargetMotion without num_frames)
+    def iter_frames(self, trajectory, mapSize, seed, chunk_size=1, start=0, stop=None):
+        end = trajectory.num_frames if hasattr(trajectory, "chunk") else trajectory.shape[1]
+        if end is not None:
+            stop = end if stop is None else min(stop, end)
+        t = start
+        while stop is None or t < stop:
+            chunk = t // chunk_size
+            packed = self.simulate_chunk(trajectory, mapSize, seed, chunk, chunk_size)
+            for offset in range(t - chunk * chunk_size, packed.num_frames):
+                if stop is not None and t >= stop:
+                    break
+                yield packed.frame(offset)
+                t += 1
+
+    # Records a scenario to a columnar file (see ScenarioFile.py), generated chunk by chunk so the
+    # frames never sit in memory all at once. Same frames as iter_frames with the same seed and chunk_size
+    def write_scenario(self, path, trajectory, mapSize, seed, chunk_size=256, metadata=None):
+        from ScenarioFile import ScenarioWriter
+
+        header = {
+            "max_range": self.max_range,
+            "sigma_base": self.sigma_base,
+            "range_ref": self.range_ref,
+            "lambda_clutter": self.lambda_clutter,
+            "radar_pos": np.asarray(self.radar_pos).tolist(),
+            "map_size": mapSize,
+            "seed": seed,
+            "chunk_size": chunk_size
+        }
+        header.update(metadata or {})
+
+        num_chunks = -(-trajectory.shape[1] // chunk_size)
+        writer = ScenarioWriter(path, header)
+        with writer:
+            for chunk in range(num_chunks):
+                writer.append(self.simulate_chunk(trajectory, mapSize, seed, chunk, chunk_size))
+            writer.close(trajectory)
@@ -1,23 +1,62 @@
 # Real Position Simulation: Generates true position of observed objects moving in 2D space
 #                           Assumes the point of observation is at origin (0,0)
 
+from functools import lru_cache
 import numpy as np
-import matplotlib.pyplot as plt
 
-# Base simulation parameters
+# Base simulation parameters (defaults for generate_trajectories)
 boxSize = 1000 
 mapSize = 1500
 numObjects = 3
 totalTime = 100
-velocityRange = [-20, 20]
+velocityRange = (-20, 20)
 dt = 1
 
-positions = np.random.uniform(0, boxSize, size = (numObjects, 2))
-velocities = np.random.uniform(velocityRange[0], velocityRange[1], size = (numObjects, 2))
-objectTrajectory = np.zeros((numObjects, totalTime, 2))
-objectTrajectory[:, 0, :] = positions
+# Constant velocity motion of every object, evaluated for any range of steps on demand
+# Lets streaming runs produce truth chunk by chunk (even without an end) instead of holding the whole trajectory
+class TargetMotion:
+    def __init__(self, positions, velocities, dt=dt, num_frames=None):
+        self.positions = positions
+        self.velocities = velocities
+        self.dt = dt
+        self.num_objects = positions.shape[0]
+        self.num_frames = num_frames # None = endless
 
-for t in range (1, totalTime):
-    positions = positions + velocities * dt
-    objectTrajectory[:, t, :] = positions
+    # (num_objects, stop - start, 2) positions for steps [start, stop)
+    def chunk(self, start, stop):
+        # Constant velocity: position at step t is the start plus t steps of velocity (whole array in one broadcast)
+        steps = np.arange(start, stop) * self.dt
+        return self.positions[:, np.newaxis, :] + self.velocities[:, np.newaxis, :] * steps[np.newaxis, :, np.newaxis]
 
+    # (num_objects, 2) positions at step t
+    def at(self, t):
+        return self.chunk(t, t + 1)[:, 0, :]
+
+def _motion(num_objects, rng, box_size, velocity_range, dt, num_frames=None):
+    positions = rng.uniform(0, box_size, size = (num_objects, 2))
+    velocities = rng.uniform(velocity_range[0], velocity_range[1], size = (num_objects, 2))
+    return TargetMotion(positions, velocities, dt, num_frames)
+
+def _simulate(num_objects, total_time, rng, box_size, velocity_range, dt):
+    return _motion(num_objects, rng, box_size, velocity_range, dt).chunk(0, total_time)
+
+@lru_cache(maxsize=32)
+def _cached(num_objects, total_time, seed, box_size, velocity_range, dt):
+    trajectory = _simulate(num_objects, total_time, np.random.default_rng(seed), box_size, velocity_range, dt)
+    trajectory.setflags(write=False) # Shared between callers, so nobody may modify it
+    return trajectory
+
+# Returns a (num_objects, total_time, 2) array of true positions
+# Seeded calls are reproducible and cached (the returned array is read-only), seed=None draws a fresh scenario every time
+def generate_trajectories(num_objects=numObjects, total_time=totalTime, seed=None,
+                          box_size=boxSize, velocity_range=velocityRange, dt=dt):
+    velocity_range = tuple(velocity_range)
+    if seed is None:
+        return _simulate(num_objects, total_time, np.random.default_rng(), box_size, velocity_range, dt)
+    return _cached(num_objects, total_time, seed, box_size, velocity_range, dt)
+
+# Same objects as generate_trajectories with the same seed, but as a TargetMotion that is evaluated chunk by chunk
+# num_frames=None keeps the objects moving forever
+def generate_motion(num_objects=numObjects, num_frames=totalTime, seed=None,
+                    box_size=boxSize, velocity_range=velocityRange, dt=dt):
+    return _motion(num_objects, np.random.default_rng(seed), box_size, tuple(velocity_range), dt, num_frames)
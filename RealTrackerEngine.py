@@ -1,23 +1,45 @@
+import time
 import numpy as np
-from RealPositionSimulation import objectTrajectory
+from RealPositionSimulation import generate_trajectories, generate_motion, totalTime
 from RadarModel import RadarModel
-from KalmanMath import KalmanMath
-from Gating import Gate
+from KalmanMath import KalmanBank
+from TrackManager import TrackPool
+from HistoryBuffer import MeasurementRing, TrackRing
+from Metrics import PipelineMetrics
+from ScenarioCache import default_cache, scenario_key
+from ScenarioFile import open_scenario
+from FrameSources import PackedFrameSource, MotionFrameSource, LogFrameSource
+from Gating import Gate, GridGate
 from AssociateNN import NearestNeighborAssociate
 from AssociatePDA import ProbabilisticDataAssociation
+from AssociateGNN import GlobalNearestNeighborAssociate
+from AssociateJPDA import JointProbabilisticDataAssociation
+
+try:
+    import tracker_cpp  # Optional C++ acceleration module (built from cpp/)
+except ImportError:
+    tracker_cpp = None
 
 class RealtrackerEngine():
-    def __init__(self, config):
+    # source overrides the config driven frame source with any FrameSource (see FrameSources.py)
+    def __init__(self, config, cache=None, source=None):
         self.config = config
-        self.reset(config)
+        self.cache = default_cache if cache is None else cache
+        self.source = None
+        self.reset(config, source)
     
-    def reset(self, config):
+    def reset(self, config, source=None):
         self.config = config
+        if self.source is not None:
+            self.source.close()
 
-        # Load trajectory 
-        self.trajectory = objectTrajectory[:config["num_objects"]]
-        self.num_objects = config["num_objects"]
-        self.num_frames = self.trajectory.shape[1]
+        # Split the run's seed into independent streams for the truth trajectories and the radar
+        seed = config.get("seed")
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        trajectory_seed, radar_seed = (int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(2))
+        if config.get("seed") is None:
+            trajectory_seed = None # Unseeded runs never repeat, so they skip generate_trajectories' cache
 
         # Radar model
         self.radar = RadarModel(
@@ -27,33 +49,59 @@ class RealtrackerEngine():
             lambda_clutter=config["lambda_clutter"]
         )
 
-        # Generate all radar frames
-        self.all_frames = self.radar.simulate_all_frames(
-            self.trajectory,
-            mapSize=2500
+        # Frame source: where each frame's measurements (and truth, when there is any) come from
+        self.map_size = 2500
+        if source is None:
+            source = self._make_source(config, trajectory_seed, radar_seed)
+        self.source = source
+        self.frame_iter = iter(source)
+        self.trajectory = getattr(source, "trajectory", None) # None for real logs, which have no truth
+        self.frames = getattr(source, "frames", None)
+        self.num_objects = source.num_objects
+        self.num_frames = source.num_frames
+
+        # Create one Kalman bank holding every object's filter
+        # With track management the bank is a fixed pool of max_tracks slots that starts out empty
+        managed = config.get("track_management", False)
+        self.bank = KalmanBank(
+            num_tracks=config.get("max_tracks", 256) if managed else self.num_objects,
+            dt=1.0,
+            process_noise=config["process_noise"],
+            measurement_noise=config["measurement_noise"]
         )
 
-        # Create Kalman filters
-        self.filters = [
-            KalmanMath(
-                dt=1.0,
-                process_noise=config["process_noise"],
-                measurement_noise=config["measurement_noise"]
+        self.pool = None
+        if managed:
+            self.pool = TrackPool(
+                self.bank,
+                confirm_m=config.get("confirm_m", 2),
+                confirm_n=config.get("confirm_n", 3),
+                max_misses=config.get("max_misses", 3),
+                birth_velocity_sigma=config.get("birth_velocity_sigma", 20.0)
             )
-            for _ in range(self.num_objects)
-        ]
-
-        # Initialize each filter with the first true position
-        for i in range(self.num_objects):
-            x0, y0 = self.trajectory[i, 0, :]
-            self.filters[i].x = np.array([[x0], [y0], [0.0], [0.0]])
+        else:
+            # Initialize each filter at the source's starting positions (the first true positions for simulated runs)
+            self.bank.x[:, :2] = source.initial_positions()
 
-        # Gating
-        self.gate = Gate(gate_threshold=config["gate_threshold"])
+        # Gating ("brute" checks every pair, "grid" uses a spatial index over each frame's measurements)
+        gate_class = GridGate if config.get("gating_backend", "brute") == "grid" else Gate
+        self.gate = gate_class(
+            gate_threshold=config["gate_threshold"],
+            metric=config.get("gate_metric", "euclidean")
+        )
 
         # Association
         if config["association_method"] == "NN":
             self.associator = NearestNeighborAssociate()
+        elif config["association_method"] == "GNN":
+            self.associator = GlobalNearestNeighborAssociate(gate_threshold=config["gate_threshold"])
+        elif config["association_method"] == "JPDA":
+            map_area = (2 * self.map_size)**2 # Clutter is spread uniformly over the whole map
+            self.associator = JointProbabilisticDataAssociation(
+                pd=config.get("detection_probability", 0.9),
+                clutter_density=max(config["lambda_clutter"], 1e-9) / map_area,
+                max_hypotheses=config.get("max_hypotheses", 10000)
+            )
         else:
             R = np.array([
                 [config["measurement_noise"]**2, 0],
@@ -61,83 +109,352 @@ class RealtrackerEngine():
             ])
             self.associator = ProbabilisticDataAssociation(R)
 
-        # Storage for filtered tracks
-        self.filtered_tracks = [[] for _ in range(self.num_objects)]
+        # C++ frame kernel: the whole predict/gate/associate/update cycle in one call per frame
+        self.cpp_params = None
+        if config.get("math_backend", "python") == "cpp":
+            self._setup_cpp(config)
+
+        # Per-stage timings and counters for /metrics (None turns instrumentation off entirely)
+        self.metrics = PipelineMetrics() if config.get("metrics", False) else None
+
+        # Headless runs (e.g. BatchRunner) can skip keeping any history at all
+        self.record_history = config.get("record_history", True)
 
-        # storage for ALL measurements across all frames
-        self.measurement_history = []
+        # History of the last history_window frames in preallocated ring buffers (memory stays flat however long the run)
+        # Filtered tracks: (num_tracks, window, 2), NaN in empty slots under track management
+        # Measurements: one flat ring of points plus per-frame offsets
+        self.track_history = None
+        self.measurement_history = None
+        if self.record_history:
+            window = config.get("history_window", 1000)
+            self.track_history = TrackRing(self.bank.num_tracks, window)
+            self.measurement_history = MeasurementRing(window, config.get("history_points"))
 
         # Reset frame counter
         self.current_frame = 0
 
     
-    def step(self):
+    def _setup_cpp(self, config):
+        if tracker_cpp is None:
+            raise RuntimeError("math_backend='cpp' needs the tracker_cpp module (build it from cpp/)")
+        if self.pool is not None:
+            raise ValueError("The C++ frame kernel runs a fixed set of tracks, it does not support track_management")
+        if config["association_method"] not in ("NN", "PDA") or self.gate.metric != "euclidean":
+            raise ValueError("The C++ frame kernel supports NN/PDA association with Euclidean gating only")
+
+        params = tracker_cpp.FrameParams()
+        params.F = self.bank.F
+        params.Q = self.bank.Q
+        params.H = self.bank.H
+        params.R = self.bank.R
+        params.R_assoc = config["measurement_noise"]**2 * np.eye(2)
+        params.gate_threshold = config["gate_threshold"]
+        params.method = tracker_cpp.AssociationMethod.NN if config["association_method"] == "NN" else tracker_cpp.AssociationMethod.PDA
+        self.cpp_params = params
+        self.cpp_threads = config.get("cpp_threads", 1) # 0 = every core
+
+        # Output buffers are allocated once and reused every frame
+        self.cpp_out = (
+            np.zeros((self.num_objects, 2)),
+            np.zeros((self.num_objects, 2)),
+            np.zeros(self.num_objects, dtype=np.uint8),
+            np.zeros(self.num_objects, dtype=np.int32)
+        )
+
+    def _make_source(self, config, trajectory_seed, radar_seed):
+        if config.get("log_path"):
+            # Recorded radar plots, parsed in chunks on a bounded prefetch thread
+            return LogFrameSource(
+                config["log_path"],
+                num_objects=config["num_objects"],
+                format=config.get("log_format"),
+                chunk_rows=config.get("log_chunk_rows", 65536),
+                frame_period=config.get("log_frame_period"),
+                prefetch=config.get("log_prefetch", 8)
+            )
+
+        if config.get("scenario_path"):
+            # Replay a recorded scenario straight off disk (memory mapped, frames are paged in as they are read)
+            scenario = open_scenario(config["scenario_path"])
+            self.map_size = scenario.metadata.get("map_size", self.map_size)
+            return PackedFrameSource(scenario.trajectory, scenario.frames)
+
+        num_frames = config.get("num_frames", totalTime)
+        if config.get("streaming", False):
+            # Lazy: truth and frames are both computed one chunk at a time as step() asks for them,
+            # so num_frames=None runs forever in constant memory
+            motion = generate_motion(num_objects=config["num_objects"], num_frames=num_frames, seed=trajectory_seed)
+            frame_iter = self.radar.iter_frames(
+                motion,
+                mapSize=self.map_size,
+                seed=radar_seed,
+                chunk_size=config.get("stream_chunk_size", 16)
+            )
+            return MotionFrameSource(motion, frame_iter)
+
+        if num_frames is None:
+            raise ValueError("num_frames=None (an endless run) needs streaming=True")
+
+        # Up front: the whole scenario in one packed array
+        def make_scenario():
+            trajectory = self._make_trajectory(config, num_frames, trajectory_seed)
+            frames = self.radar.simulate_packed(
+                trajectory,
+                mapSize=self.map_size,
+                rng=np.random.default_rng(radar_seed)
+            )
+            return trajectory, frames
+
+        if config.get("seed") is not None and config.get("scenario_cache", True):
+            # Seeded scenarios are deterministic, so a repeated /reset reuses the cached one
+            trajectory, frames = self.cache.get_or_create(scenario_key(config, num_frames), make_scenario)
+        else:
+            trajectory, frames = make_scenario()
+        return PackedFrameSource(trajectory, frames)
+
+    def _make_trajectory(self, config, num_frames, seed):
+        return generate_trajectories(
+            num_objects=config["num_objects"],
+            total_time=num_frames,
+            seed=seed
+        )
+
+    # Runs one tracking cycle and returns this frame's results as NumPy arrays (no JSON conversion)
+    def advance(self):
         t = self.current_frame
-        frame_measurements = self.all_frames[t]
+        try:
+            timestamp, frame_measurements = next(self.frame_iter)
+        except StopIteration:
+            raise IndexError(f"No frames left after frame {t - 1}") from None
+        frame_meas = np.asarray(frame_measurements, dtype=float).reshape(-1, 2) # Recorded scenarios store float32
 
         # append this frame's measurements to history
-        self.measurement_history.append(frame_measurements.tolist())
+        if self.record_history:
+            self.measurement_history.append(frame_meas)
+
+        if self.cpp_params is not None:
+            return self._advance_cpp(t, timestamp, frame_meas)
+        if self.pool is not None:
+            return self._advance_managed(t, timestamp, frame_meas)
+
+        clock = self.metrics.clock() if self.metrics is not None else None
+
+        # Prediction step (all objects at once)
+        self.bank.predict()
+        predicted = self.bank.predicted_z
+        if clock is not None:
+            clock.lap("predict")
+
+        # Gating and association steps
+        z_bars, has_meas, _ = self._gate_and_associate(predicted, self.bank.S, frame_meas, clock)
+
+        # Update step (only objects that received a measurement)
+        self.bank.update(z_bars, mask=has_meas)
+        if clock is not None:
+            clock.lap("update")
+            self.metrics.frame(len(frame_meas), self.num_objects)
 
-        # Prepare output container
-        frame_output = {
+        # Storing the filtered positions
+        filtered = self.bank.x[:, :2].copy()
+        if self.record_history:
+            self.track_history.append(filtered)
+
+        # Next time step
+        self.current_frame += 1
+
+        # Only this frame's data is returned, clients keep their own history and use history() to fill gaps
+        return {
+            "seq": t,
             "frame_index": t,
-            "measurements": frame_measurements.tolist(),
-            "predicted_positions": [],
-            "filtered_positions": []
+            "timestamp": timestamp,
+            "measurements": frame_meas,
+            "predicted_positions": predicted,
+            "filtered_positions": filtered,
+            "track_ids": np.arange(self.num_objects),
+            "truth_positions": self._truth(t)  # truth positions for this frame
         }
 
-        # Loop over each object
-        for i in range(self.num_objects):
-            kf = self.filters[i]
+    # Gates every track against every measurement at once, then associates
+    # Returns (z_bars, has_meas, gate_matrix), tracks with has_meas False got no measurement
+    def _gate_and_associate(self, predicted, S, frame_meas, clock=None):
+        num_tracks = len(predicted)
+        gate_matrix, dists = self.gate.gate_batch(predicted, frame_meas, S=S)
+        if clock is not None:
+            clock.lap("gate")
 
-            # Prediction step
-            kf.predict()
-            predicted_z = (kf.H @ kf.x).flatten()
-            frame_output["predicted_positions"].append(predicted_z.tolist())
+        if hasattr(self.associator, "associate_frame"):
+            # Frame level associators solve every object together
+            z_bars, has_meas, info = self.associator.associate_frame(predicted, frame_meas, gate_matrix, dists, S)
+        else:
+            z_bars = np.zeros((num_tracks, 2))
+            has_meas = np.zeros(num_tracks, dtype=bool)
 
-            # Gating step
-            gated, _ = self.gate.gate_measurement(predicted_z, frame_measurements)
+            # Loop over each object
+            for i in range(num_tracks):
+                predicted_z = predicted[i]
+                gated = frame_meas[gate_matrix[i]]
 
-            # Association step
-            z_bar, info = self.associator.choose(predicted_z, gated)
+                z_bar, info = self.associator.choose(predicted_z, gated)
 
-            # Update step
-            if z_bar is not None and len(z_bar) != 0:
-                kf.update(z_bar)
+                if z_bar is not None and len(z_bar) != 0:
+                    z_bars[i] = z_bar
+                    has_meas[i] = True
 
-            # Storing the filtered positions
-            filtered_pos = [kf.x[0,0], kf.x[1,0]]
-            self.filtered_tracks[i].append(filtered_pos)
-            frame_output["filtered_positions"].append(filtered_pos)
+        if clock is not None:
+            clock.lap("associate")
+        return z_bars, has_meas, gate_matrix
 
-        # Next time step
+    # One tracking cycle with track management: only live slots are predicted and associated, measurements outside
+    # every gate start tentative tracks, and only confirmed tracks are reported
+    def _advance_managed(self, t, timestamp, frame_meas):
+        pool = self.pool
+        bank = self.bank
+        clock = self.metrics.clock() if self.metrics is not None else None
+        rows = pool.active_rows()
+
+        bank.predict(mask=pool.active)
+        predicted = bank.x[rows] @ bank.H.T
+        S = bank.H @ bank.P[rows] @ bank.H.T + bank.R
+        if clock is not None:
+            clock.lap("predict")
+        z_bars, has_meas, gate_matrix = self._gate_and_associate(predicted, S, frame_meas, clock)
+
+        z_full = np.zeros((pool.capacity, 2))
+        z_full[rows] = z_bars
+        has_full = np.zeros(pool.capacity, dtype=bool)
+        has_full[rows] = has_meas
+        bank.update(z_full, mask=has_full)
+        if clock is not None:
+            clock.lap("update")
+
+        # Lifecycle: confirm / delete existing tracks, then births from unclaimed measurements
+        pool.record(rows, has_meas)
+        pool.spawn(frame_meas[~gate_matrix.any(axis=0)])
+
+        confirmed = pool.confirmed_rows() # Newborn tracks are tentative, so these all had a prediction
+        if clock is not None:
+            clock.lap("lifecycle")
+            self.metrics.frame(len(frame_meas), len(confirmed), len(pool))
+        predicted_full = np.zeros((pool.capacity, 2))
+        predicted_full[rows] = predicted
+        filtered = bank.x[confirmed, :2].copy()
+
+        if self.record_history:
+            # Per slot positions, NaN where the slot holds no confirmed track (breaks the line between reused slots)
+            self.track_history.append(filtered, rows=confirmed)
+        self.current_frame += 1
+
+        return {
+            "seq": t,
+            "frame_index": t,
+            "timestamp": timestamp,
+            "measurements": frame_meas,
+            "predicted_positions": predicted_full[confirmed],
+            "filtered_positions": filtered,
+            "track_ids": pool.track_ids[confirmed].copy(),
+            "truth_positions": self._truth(t)
+        }
+
+    def _advance_cpp(self, t, timestamp, frame_meas):
+        frame_meas = np.ascontiguousarray(frame_meas, dtype=float)
+        clock = self.metrics.clock() if self.metrics is not None else None
+        if self.cpp_threads == 1:
+            predicted, _, _, _ = tracker_cpp.step_frame(self.bank.x, self.bank.P, frame_meas, self.cpp_params, *self.cpp_out)
+        else:
+            # Blocks of tracks run on the extension's thread pool (same numbers as the single thread path)
+            predicted, _, _, _ = tracker_cpp.step_frame_parallel(
+                self.bank.x, self.bank.P, frame_meas, self.cpp_params, self.cpp_threads, *self.cpp_out
+            )
+        if clock is not None:
+            clock.lap("cpp_step")
+            self.metrics.frame(len(frame_meas), self.num_objects)
+
+        filtered = self.bank.x[:, :2].copy()
+        if self.record_history:
+            self.track_history.append(filtered)
         self.current_frame += 1
 
+        return {
+            "seq": t,
+            "frame_index": t,
+            "timestamp": timestamp,
+            "measurements": frame_meas,
+            "predicted_positions": predicted.copy(),
+            "filtered_positions": filtered,
+            "track_ids": np.arange(self.num_objects),
+            "truth_positions": self._truth(t)
+        }
+
+    # Sources without ground truth (real logs) report an empty (0, 2) block
+    def _truth(self, t):
+        truth = self.source.truth(t)
+        return np.zeros((0, 2)) if truth is None else truth
+
+    def close(self):
+        self.source.close()
+
+    def step(self):
+        frame = self.advance()
+        start = time.perf_counter_ns() if self.metrics is not None else 0
+
         # --- JSON‑SAFE CONVERSION ---
-        safe_output = {
-            "frame_index": int(t),
-            "measurements": frame_measurements.tolist(),
+        result = {
+            "seq": int(frame["seq"]),
+            "frame_index": int(frame["frame_index"]),
+            "timestamp": float(frame["timestamp"]),
+            "measurements": frame["measurements"].tolist(),
+            "predicted_positions": frame["predicted_positions"].tolist(),
+            "filtered_positions": frame["filtered_positions"].tolist(),
+            "track_ids": frame["track_ids"].tolist(),
+            "truth_positions": frame["truth_positions"].tolist()
+        }
+        if self.metrics is not None:
+            self.metrics.observe("serialize", time.perf_counter_ns() - start)
+        return result
 
-            "predicted_positions": [
-                [float(v) for v in pos] for pos in frame_output["predicted_positions"]
-            ],
+    # History for frames [start, stop) as arrays: measurements packed into one array plus per-frame offsets,
+    # tracks as a (num_tracks, stop - start, 2) block
+    # Frames older than the history window are gone, so start is moved up to the oldest one still held
+    def history_arrays(self, start=0, stop=None):
+        stop = self.current_frame if stop is None else min(stop, self.current_frame)
+        start = max(0, min(start, stop))
 
-            "filtered_positions": [
-                [float(v) for v in pos] for pos in frame_output["filtered_positions"]
-            ],
+        if self.measurement_history is None:
+            start = stop
+            measurements, offsets = np.zeros((0, 2)), np.zeros(1, dtype=np.int64)
+            tracks = np.zeros((self.bank.num_tracks, 0, 2))
+        else:
+            start = max(start, self.track_history.first_frame)
+            measurements, offsets, start = self.measurement_history.read(start, stop)
+            tracks = self.track_history.read(start, stop)
 
-            "track_history": [
-                [[float(v) for v in pos] for pos in track]
-                for track in self.filtered_tracks
-            ],
+        return {
+            "start": start,
+            "stop": stop,
+            "track_history": tracks,
+            "measurement_history": measurements,
+            "measurement_offsets": offsets
+        }
 
-            "measurement_history": self.measurement_history,
+    # History for frames [start, stop) in the same JSON-safe layout step() uses, fetched on demand instead of every frame
+    def history(self, start=0, stop=None):
+        arrays = self.history_arrays(start, stop)
+        offsets = arrays["measurement_offsets"]
+        measurements = arrays["measurement_history"]
 
-            # truth positions for this frame
-            "truth_positions": [
-                [float(self.trajectory[i, t, 0]), float(self.trajectory[i, t, 1])]
-                for i in range(self.num_objects)
+        return {
+            "start": int(arrays["start"]),
+            "stop": int(arrays["stop"]),
+            "track_history": _json_positions(arrays["track_history"]),
+            "measurement_history": [
+                measurements[offsets[k]:offsets[k + 1]].tolist() for k in range(len(offsets) - 1)
             ]
         }
-        
-        return safe_output
\ No newline at end of file
+
+# NaN (no confirmed track in a slot) is not valid JSON, it goes out as null
+def _json_positions(arr):
+    if not np.isnan(arr).any():
+        return arr.tolist()
+    out = arr.astype(object)
+    out[np.isnan(arr)] = None
+    return out.tolist()
@@ -0,0 +1,136 @@
+# Cache of generated scenarios (truth trajectories + packed radar frames) so /reset with an unchanged config is instant
+# Entries are keyed by the parameters that shape the scenario, bounded by memory and evicted least recently used first.
+# With a spill directory, evicted entries are written to .npy files and later reloaded through memory mapping.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from RadarModel import PackedFrames
+
+# Config fields that determine the generated scenario (anything else, e.g. the association method, does not)
+def scenario_key(config, num_frames):
+    return (
+        config.get("seed"),
+        int(config["num_objects"]),
+        float(config["sigma_base"]),
+        float(config["range_ref"]),
+        float(config["lambda_clutter"]),
+        float(config["max_range"]),
+        int(num_frames)
+    )
+
+def _nbytes(trajectory, frames):
+    return trajectory.nbytes + frames.measurements.nbytes + frames.offsets.nbytes + frames.labels.nbytes
+
+def _read_only(*arrays):
+    for arr in arrays:
+        if isinstance(arr, np.ndarray) and arr.flags.writeable:
+            arr.setflags(write=False)
+
+class ScenarioCache:
+    def __init__(self, max_bytes=256 * 1024**2, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir # None keeps everything in memory only
+        self._entries = OrderedDict() # key -> (trajectory, frames, nbytes), least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    # Returns (trajectory, frames) or None, checking memory first and then the spill directory
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0], entry[1]
+
+        loaded = self._load_spilled(key)
+        if loaded is not None:
+            # Memory mapped arrays live in the page cache, so they are cheap to keep around
+            with self._lock:
+                self._entries[key] = (loaded[0], loaded[1], 0)
+        return loaded
+
+    def put(self, key, trajectory, frames):
+        _read_only(trajectory, frames.measurements, frames.offsets, frames.labels)
+        size = _nbytes(trajectory, frames)
+        if size > self.max_bytes:
+            self._spill(key, trajectory, frames) # Too big to keep in memory at all
+            return
+
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (trajectory, frames, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, (old_traj, old_frames, old_size) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+                evicted.append((old_key, old_traj, old_frames, old_size))
+
+        for old_key, old_traj, old_frames, old_size in evicted:
+            if old_size > 0:
+                self._spill(old_key, old_traj, old_frames)
+
+    # Builds the scenario with make() on a miss, make() returns (trajectory, frames)
+    def get_or_create(self, key, make):
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        trajectory, frames = make()
+        self.put(key, trajectory, frames)
+        return trajectory, frames
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _paths(self, key):
+        name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20]
+        base = os.path.join(self.spill_dir, name)
+        return {part: f"{base}_{part}.npy" for part in ("trajectory", "measurements", "offsets", "labels")}
+
+    def _spill(self, key, trajectory, frames):
+        if self.spill_dir is None:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        paths = self._paths(key)
+        if all(os.path.exists(p) for p in paths.values()):
+            return
+        arrays = {
+            "trajectory": trajectory,
+            "measurements": frames.measurements,
+            "offsets": frames.offsets,
+            "labels": frames.labels
+        }
+        # Write to a temporary name first so a crash never leaves half a scenario behind
+        for part, path in paths.items():
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, np.asarray(arrays[part]))
+            os.replace(tmp, path)
+
+    def _load_spilled(self, key):
+        if self.spill_dir is None:
+            return None
+        paths = self._paths(key)
+        if not all(os.path.exists(p) for p in paths.values()):
+            return None
+        arrays = {part: np.load(path, mmap_mode="r") for part, path in paths.items()}
+        frames = PackedFrames(arrays["measurements"], arrays["offsets"], arrays["labels"])
+        return arrays["trajectory"], frames
+
+# Shared by every engine in the process (the backend serves many sessions)
+default_cache = ScenarioCache(spill_dir=os.environ.get("RADAR_SCENARIO_CACHE_DIR"))
@@ -0,0 +1,170 @@
+# Columnar on-disk format for recorded scenarios, replayed through np.memmap so huge runs never load into memory
+#
+# Layout:  b"RTSCN1\0\0" | uint64 header offset | uint64 header length | padding | sections ... | JSON header
+# Sections (each 64-byte aligned):
+#   measurements  float32 (K, 2)         every measurement of the run, frame major
+#   labels        int32   (K,)           producing object per measurement, -1 for clutter
+#   offsets       int64   (T + 1,)       frame t lives in measurements[offsets[t]:offsets[t + 1]]
+#   trajectory    float64 (N, T, 2)      truth positions
+# The header sits at the end so measurements can be streamed to disk before their total count is known
+
+import json
+import os
+import shutil
+import struct
+import numpy as np
+from RadarModel import PackedFrames
+
+MAGIC = b"RTSCN1\0\0"
+VERSION = 1
+_PREAMBLE = len(MAGIC) + 16
+
+def _align(n, alignment=64):
+    return (n + alignment - 1) // alignment * alignment
+
+# Appends frames chunk by chunk, only the offsets (8 bytes per frame, in a growable int64 buffer) stay in memory
+# Labels are streamed to a side file and copied in behind the measurements on close(), a block at a time
+class ScenarioWriter:
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self._file = open(path, "wb")
+        self._labels_path = path + ".labels.tmp"
+        self._labels = open(self._labels_path, "wb")
+        self._offsets = np.zeros(1024, dtype=np.int64)
+        self._num_frames = 0
+        self._file.write(b"\0" * _align(_PREAMBLE))
+        self._measurements_start = self._file.tell()
+
+    @property
+    def num_frames(self):
+        return self._num_frames
+
+    @property
+    def num_measurements(self):
+        return int(self._offsets[self._num_frames])
+
+    def append(self, frames):
+        np.ascontiguousarray(frames.measurements, dtype="<f4").tofile(self._file)
+        np.ascontiguousarray(frames.labels, dtype="<i4").tofile(self._labels)
+
+        new = np.asarray(frames.offsets[1:], dtype=np.int64)
+        end = self._num_frames + 1 + len(new)
+        if end > len(self._offsets):
+            grown = np.zeros(max(2 * len(self._offsets), end), dtype=np.int64)
+            grown[:self._num_frames + 1] = self._offsets[:self._num_frames + 1]
+            self._offsets = grown
+        self._offsets[self._num_frames + 1:end] = self._offsets[self._num_frames] + new
+        self._num_frames += len(new)
+
+    def _pad(self):
+        start = _align(self._file.tell())
+        self._file.write(b"\0" * (start - self._file.tell()))
+        return start
+
+    def _section(self, arr):
+        start = self._pad()
+        np.ascontiguousarray(arr).tofile(self._file)
+        return {"offset": start, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+
+    def close(self, trajectory):
+        sections = {
+            "measurements": {
+                "offset": self._measurements_start,
+                "dtype": np.dtype("<f4").str,
+                "shape": [self.num_measurements, 2]
+            }
+        }
+
+        # Labels can be as long as the measurements, so they are copied over in fixed size blocks
+        self._labels.close()
+        start = self._pad()
+        with open(self._labels_path, "rb") as labels:
+            shutil.copyfileobj(labels, self._file, 1 << 20)
+        count = (self._file.tell() - start) // np.dtype("<i4").itemsize
+        sections["labels"] = {"offset": start, "dtype": np.dtype("<i4").str, "shape": [count]}
+        os.remove(self._labels_path)
+
+        sections["offsets"] = self._section(self._offsets[:self._num_frames + 1].astype("<i8"))
+        sections["trajectory"] = self._section(np.asarray(trajectory, dtype="<f8"))
+
+        header = json.dumps({
+            "version": VERSION,
+            "num_frames": self.num_frames,
+            "num_objects": int(trajectory.shape[0]),
+            "num_measurements": self.num_measurements,
+            "sections": sections,
+            "metadata": self.metadata
+        }).encode("utf-8")
+        header_offset = self._file.tell()
+        self._file.write(header)
+
+        self._file.seek(0)
+        self._file.write(MAGIC)
+        self._file.write(struct.pack("<QQ", header_offset, len(header)))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            # Never leave a half written scenario behind
+            self._file.close()
+            self._labels.close()
+            for path in (self.path, self._labels_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        return False
+
+# Writes a whole in-memory scenario in one go
+def write_scenario(path, trajectory, frames, metadata=None):
+    writer = ScenarioWriter(path, metadata)
+    with writer:
+        writer.append(frames)
+        writer.close(trajectory)
+
+# A recorded scenario opened read-only, every array is a memmap so any frame is an O(1) slice
+class ScenarioFile:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            preamble = f.read(_PREAMBLE)
+            if preamble[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a radar scenario file")
+            header_offset, header_len = struct.unpack("<QQ", preamble[len(MAGIC):])
+            f.seek(header_offset)
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported scenario file version {header['version']}")
+
+        self.header = header
+        self.metadata = header["metadata"]
+        sections = {name: self._map(spec) for name, spec in header["sections"].items()}
+
+        # Offsets are tiny next to the measurements, keeping them in memory makes frame lookups free
+        self.frames = PackedFrames(sections["measurements"], np.array(sections["offsets"]), sections["labels"])
+        self.trajectory = sections["trajectory"]
+
+    def _map(self, spec):
+        shape = tuple(spec["shape"])
+        if int(np.prod(shape, dtype=np.int64)) == 0:
+            return np.zeros(shape, dtype=spec["dtype"]) # np.memmap refuses empty maps
+        return np.memmap(self.path, dtype=spec["dtype"], mode="r", offset=spec["offset"], shape=shape)
+
+    @property
+    def num_frames(self):
+        return self.header["num_frames"]
+
+    @property
+    def num_objects(self):
+        return self.header["num_objects"]
+
+    def __len__(self):
+        return self.num_frames
+
+    def frame(self, t):
+        return self.frames.frame(t)
+
+def open_scenario(path):
+    return ScenarioFile(path)
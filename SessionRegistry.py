@@ -0,0 +1,81 @@
+# Keeps one RealtrackerEngine per client session so a single backend process can serve many dashboards at once
+# Sessions live in a bounded LRU map and are evicted when idle for too long, each one has its own lock
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+class Session:
+    def __init__(self, session_id, config):
+        self.session_id = session_id
+        self.config = config # Latest configuration sent through /configure
+        self.engine = None # Built on /reset
+        self.lock = threading.Lock() # Serializes reset/step/history calls on this session
+        self.last_used = time.monotonic()
+        self.broadcaster = None # Pushes frames to /stream viewers, created by the first one
+
+    # Releases whatever the engine holds open (e.g. a log reader thread) and ends any stream
+    # Waits for a step that is running on this session to finish first
+    def close(self):
+        if self.broadcaster is not None:
+            self.broadcaster.stop()
+        with self.lock:
+            if self.engine is not None:
+                self.engine.close()
+                self.engine = None
+
+class SessionRegistry:
+    def __init__(self, max_sessions=64, idle_timeout=1800.0):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout # Seconds without a request before a session is dropped
+        self._sessions = OrderedDict() # Least recently used first
+        self._lock = threading.Lock() # Guards the map itself, never held while an engine is running
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, config):
+        session = Session(uuid.uuid4().hex, config)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            evicted = self._evict()
+        self._close(evicted)
+        return session
+
+    # Returns the session (marking it as recently used) or None if it never existed or was evicted
+    def get(self, session_id):
+        with self._lock:
+            evicted = self._evict()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+        self._close(evicted)
+        return session
+
+    def remove(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        session.close()
+        return True
+
+    def sessions(self):
+        with self._lock:
+            return list(self._sessions.values())
+
+    # Takes expired sessions out of the map (call with self._lock held) and returns them for _close
+    def _evict(self):
+        now = time.monotonic()
+        idle = [sid for sid, s in self._sessions.items() if now - s.last_used > self.idle_timeout]
+        evicted = [self._sessions.pop(sid) for sid in idle]
+        while len(self._sessions) > self.max_sessions:
+            evicted.append(self._sessions.popitem(last=False)[1])
+        return evicted
+
+    # Closing can wait on a running step or a reader thread, so it happens after the map lock is released
+    def _close(self, sessions):
+        for session in sessions:
+            session.close()
@@ -0,0 +1,162 @@
+# Server push for frames: one asyncio task per session steps the engine at a target rate and fans each frame out to
+# every viewer subscribed to that session (Server-Sent Events, see /stream in BackendLogic)
+# The engine math runs on a worker thread (asyncio.to_thread) so the event loop never blocks on it.
+# Every subscriber has a small bounded queue: a slow viewer loses its oldest frames instead of holding everyone back,
+# and when no viewer has room at all the stepping task waits (backpressure) instead of computing frames nobody can take
+
+import asyncio
+import json
+import time
+import traceback
+
+END = object() # Queued once the run is over (or the stream was stopped)
+
+# Queued instead of END when the engine failed, viewers get an error event (with the message) before the end event
+class StreamError:
+    def __init__(self, message):
+        self.message = message
+
+class Subscriber:
+    def __init__(self, maxsize):
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0 # Frames this viewer never saw because it fell behind
+
+    def offer(self, item):
+        if self.queue.full():
+            self.queue.get_nowait() # Drop the oldest frame, the newest one is what a viewer wants to see
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+class FrameBroadcaster:
+    def __init__(self, session, fps=20.0, queue_size=4):
+        self.session = session
+        self.fps = fps # <= 0 steps as fast as the slowest of (engine, fastest viewer) allows
+        self.queue_size = queue_size
+        self.subscribers = set()
+        self.frames_sent = 0
+        self._task = None
+        self._loop = None
+        self._stopped = False # Set by stop(), a stopped broadcaster never steps again
+        self._room = asyncio.Event() # Set whenever some subscriber can take another frame
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self):
+        subscriber = Subscriber(self.queue_size)
+        self.subscribers.add(subscriber)
+        self._room.set()
+        if not self.running:
+            self._loop = asyncio.get_running_loop()
+            self._task = self._loop.create_task(self._run())
+        return subscriber
+
+    # The stepping task stops by itself once the last viewer is gone
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+        self._room.set()
+
+    # Safe to call from any thread (sessions are closed from the sync endpoints' worker threads)
+    # The flag matters when a _step is already queued behind session.lock (e.g. /reset holding it while it calls this),
+    # it must not step the engine that replaces the old one
+    def stop(self):
+        self._stopped = True
+        if self.running:
+            self._loop.call_soon_threadsafe(self._task.cancel)
+
+    # Runs on a worker thread: one engine step, serialized once for every subscriber
+    def _step(self):
+        self.session.last_used = time.monotonic() # A watched session is not idle, even without requests
+        with self.session.lock:
+            engine = self.session.engine
+            if engine is None or self._stopped:
+                return None
+            try:
+                frame = engine.step()
+            except IndexError:
+                return None # Out of frames
+            return frame["seq"], json.dumps(frame)
+
+    def _has_room(self):
+        return any(not s.queue.full() for s in self.subscribers)
+
+    async def _run(self):
+        last = END
+        try:
+            next_due = time.perf_counter()
+            while self.subscribers:
+                # Backpressure: nobody can take a frame right now, so wait for a viewer to catch up
+                while self.subscribers and not self._has_room():
+                    self._room.clear()
+                    await self._room.wait()
+                if not self.subscribers:
+                    break
+
+                try:
+                    item = await asyncio.to_thread(self._step)
+                except Exception as e:
+                    print("\n--- BACKEND STREAM CRASH ---")
+                    print("Error:", e)
+                    traceback.print_exc()
+                    print("---------------------------\n")
+                    last = StreamError(f"Backend crashed: {e}")
+                    break
+                if item is None:
+                    break
+                for subscriber in list(self.subscribers):
+                    subscriber.offer(item)
+                self.frames_sent += 1
+
+                if self.fps > 0:
+                    next_due = max(next_due + 1.0 / self.fps, time.perf_counter() - 1.0) # Never build up more than 1 s of debt
+                    delay = next_due - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+        finally:
+            for subscriber in list(self.subscribers):
+                subscriber.offer(last)
+
+    # Async generator of SSE messages for one viewer, with keepalive comments while no frames arrive
+    async def events(self, subscriber, keepalive=15.0):
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                self._room.set()
+
+                if isinstance(item, StreamError):
+                    yield f"event: error\ndata: {json.dumps({'error': item.message})}\n\n"
+                if item is END or isinstance(item, StreamError):
+                    yield "event: end\ndata: {}\n\n"
+                    return
+                seq, payload = item
+                yield f"id: {seq}\ndata: {payload}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+# Reads an SSE response (requests with stream=True) back into decoded frames, stops at the end event
+# An error event from the backend is raised as RuntimeError carrying its message
+def iter_sse_frames(response):
+    event = "message"
+    data = []
+    for raw in response.iter_lines(decode_unicode=True):
+        if raw is None:
+            continue
+        if raw == "":
+            if data:
+                if event == "end":
+                    return
+                if event == "error":
+                    raise RuntimeError(json.loads("\n".join(data)).get("error", "Backend stream failed"))
+                yield json.loads("\n".join(data))
+            event, data = "message", []
+        elif raw.startswith(":"):
+            continue # Keepalive comment
+        elif raw.startswith("event:"):
+            event = raw[6:].strip()
+        elif raw.startswith("data:"):
+            data.append(raw[5:].lstrip())
@@ -0,0 +1,90 @@
+# Track lifecycle for runs where the number of targets is unknown: tracks are born from measurements that fall
+# outside every existing gate, confirmed with an M-of-N rule and deleted after too many missed detections
+# All state lives in a preallocated pool of slots (the KalmanBank rows plus the arrays below), freed slots are reused,
+# so thousands of births and deaths never allocate or grow anything
+
+import numpy as np
+
+FREE = 0
+TENTATIVE = 1
+CONFIRMED = 2
+
+class TrackPool:
+    def __init__(self, bank, confirm_m=2, confirm_n=3, max_misses=3, birth_velocity_sigma=20.0):
+        if not 1 <= confirm_m <= confirm_n <= 16:
+            raise ValueError("M-of-N confirmation needs 1 <= M <= N <= 16")
+
+        self.bank = bank # KalmanBank sized to the pool capacity, one row per slot
+        self.confirm_m = confirm_m
+        self.confirm_n = confirm_n
+        self.max_misses = max_misses # Consecutive misses before a confirmed track is deleted
+
+        capacity = bank.num_tracks
+        self.status = np.zeros(capacity, dtype=np.int8) # FREE / TENTATIVE / CONFIRMED
+        self.track_ids = np.full(capacity, -1, dtype=np.int64) # Never reused, unlike the slots
+        self.hits = np.zeros(capacity, dtype=np.uint16) # Bit k set = detection k frames ago (last N frames)
+        self.misses = np.zeros(capacity, dtype=np.int32) # Consecutive missed frames
+        self.age = np.zeros(capacity, dtype=np.int32) # Frames since birth
+        self.next_id = 0
+
+        self._window = (1 << confirm_n) - 1
+        self._popcount = np.array([bin(i).count("1") for i in range(1 << confirm_n)], dtype=np.int32)
+
+        # Newborn tracks sit on their measurement with an unknown velocity
+        self._birth_P = np.diag([bank.R[0, 0], bank.R[1, 1], birth_velocity_sigma**2, birth_velocity_sigma**2])
+
+    @property
+    def capacity(self):
+        return len(self.status)
+
+    @property
+    def active(self):
+        return self.status != FREE
+
+    def active_rows(self):
+        return np.flatnonzero(self.status != FREE)
+
+    def confirmed_rows(self):
+        return np.flatnonzero(self.status == CONFIRMED)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.status))
+
+    # Records which of the active rows were updated with a measurement this frame, then confirms and deletes
+    def record(self, rows, has_meas):
+        hits = ((self.hits[rows].astype(np.int32) << 1) | has_meas) & self._window
+        self.hits[rows] = hits
+        self.misses[rows] = np.where(has_meas, 0, self.misses[rows] + 1)
+        self.age[rows] += 1
+
+        status = self.status[rows]
+        confirm = (status == TENTATIVE) & (self._popcount[hits] >= self.confirm_m)
+        # Tentative tracks get N frames to collect M hits, confirmed ones die on a run of misses
+        drop = ((status == TENTATIVE) & ~confirm & (self.age[rows] >= self.confirm_n)) | \
+               ((status == CONFIRMED) & (self.misses[rows] >= self.max_misses))
+
+        self.status[rows[confirm]] = CONFIRMED
+        self.free(rows[drop])
+
+    def free(self, rows):
+        self.status[rows] = FREE
+        self.track_ids[rows] = -1
+
+    # Starts a tentative track on each measurement, as far as there are free slots (the rest are dropped)
+    # Returns the slots that were filled
+    def spawn(self, measurements):
+        free = np.flatnonzero(self.status == FREE)[:len(measurements)]
+        n = len(free)
+        if n == 0:
+            return free
+
+        self.bank.x[free] = 0.0
+        self.bank.x[free, :2] = measurements[:n]
+        self.bank.P[free] = self._birth_P
+        self.status[free] = TENTATIVE
+        self.track_ids[free] = np.arange(self.next_id, self.next_id + n)
+        self.next_id += n
+        self.hits[free] = 1 # The birth measurement counts as the first hit
+        self.misses[free] = 0
+        self.age[free] = 1
+        return free
@@ -2,9 +2,9 @@
 
 import streamlit as st
 import requests
-import matplotlib.pyplot as plt
-from AppVisualizer import plot_tracking_view, plot_truth_view
-import time
+from AppVisualizer import LiveRenderer
+from FrameCodec import decode_frame, split_measurement_history, MEDIA_TYPE
+from Streaming import iter_sse_frames
 
 Backend_URL = "http://127.0.0.1:8000"
 
@@ -24,8 +24,8 @@ st.sidebar.header("Simulation Settings")
 num_objects = st.sidebar.selectbox("Number of objects you'd like to track:", [1, 2, 3, 4, 5])
 association_method = st.sidebar.radio(
     "Association Method",
-    ["NN", "PDA"],
-    help="NN = Nearest Neighbor. PDA = Probabilistic Data Association."
+    ["NN", "GNN", "PDA", "JPDA"],
+    help="NN = Nearest Neighbor. GNN = Global Nearest Neighbor (no shared returns). PDA = Probabilistic Data Association. JPDA = Joint PDA (shares returns between nearby tracks)."
 )
 
 sigma_base = st.sidebar.slider("Sigma Base (Measurement Noise)", 1, 75, 45)
@@ -38,6 +38,43 @@ sim_speed = st.sidebar.selectbox("Select the speed of the simulation:", ["Normal
 if "running" not in st.session_state:
     st.session_state.running = False
 
+# Backend session this browser tab owns (handed out by /configure)
+if "session_id" not in st.session_state:
+    st.session_state.session_id = None
+
+# History lives on the client, every streamed frame only carries the newest frame
+# Only the radar returns are kept, the renderer builds track trails from the streamed estimates itself
+def empty_history():
+    return {"measurement_history": [], "next_seq": 0}
+
+if "history" not in st.session_state:
+    st.session_state.history = empty_history()
+
+# One figure for the whole session, redrawn in place every frame
+if "renderer" not in st.session_state:
+    st.session_state.renderer = LiveRenderer()
+
+# Frames and history are requested in the binary format (errors still come back as JSON)
+def read_payload(resp):
+    if resp.headers.get("content-type", "").startswith(MEDIA_TYPE):
+        return decode_frame(resp.content)
+    return resp.json()
+
+# Appends one streamed frame's returns to the local history, fetching the returns of any frames we missed from /history first
+def extend_history(history, frame):
+    seq = frame["seq"]
+    if seq > history["next_seq"]:
+        resp = requests.get(
+            f"{Backend_URL}/history",
+            params={"start": history["next_seq"], "stop": seq, "format": "binary", "session_id": st.session_state.session_id}
+        )
+        missing = read_payload(resp)
+        if "error" not in missing:
+            history["measurement_history"].extend(split_measurement_history(missing))
+
+    history["measurement_history"].append(frame["measurements"])
+    history["next_seq"] = seq + 1
+
 # Everything that will be passed into our backend files for calculations and frame output
 config = {
     "num_objects": num_objects,
@@ -57,7 +94,8 @@ col1, col2 = st.columns(2)
 with col1:
     if st.button("Start Simulation"):
         # Send config
-        resp = requests.post(f"{Backend_URL}/configure", json=config)
+        params = {"session_id": st.session_state.session_id} if st.session_state.session_id else {}
+        resp = requests.post(f"{Backend_URL}/configure", json=config, params=params)
         try:
             config_response = resp.json()
         except Exception:
@@ -65,8 +103,10 @@ with col1:
             st.code(resp.text)
             st.stop()
 
+        st.session_state.session_id = config_response.get("session_id")
+
         # Reset engine
-        resp = requests.get(f"{Backend_URL}/reset")
+        resp = requests.get(f"{Backend_URL}/reset", params={"session_id": st.session_state.session_id})
         try:
             reset_response = resp.json()
         except Exception:
@@ -78,6 +118,8 @@ with col1:
             st.error(reset_response["error"])
             st.stop()
 
+        st.session_state.history = empty_history()
+        st.session_state.renderer.clear()
         st.session_state.running = True
 
 
@@ -85,7 +127,7 @@ with col2:
     if st.button("Reset Simulation"):
         st.session_state.running = False
 
-        resp = requests.get(f"{Backend_URL}/reset")
+        resp = requests.get(f"{Backend_URL}/reset", params={"session_id": st.session_state.session_id})
         try:
             reset_response = resp.json()
         except Exception:
@@ -93,46 +135,45 @@ with col2:
             st.code(resp.text)
             st.stop()
 
+        st.session_state.history = empty_history()
+        st.session_state.renderer.clear()
         st.success("Simulation reset! Ready to start again.")
 
 
+# Frames per second pushed by the backend for each speed setting (0 = as fast as the engine and this page keep up)
+STREAM_FPS = {"Normal": 15.0, "Fast": 30.0, "Super Sim": 0.0}
+
 # Simulation loop, meant to mimic "real-time" tracking of an object
+# The backend pushes frames over /stream (Server-Sent Events), if drawing falls behind it skips frames and
+# extend_history fills them in from /history
 if st.session_state.running:
     placeholder = st.empty()
 
-    while st.session_state.running:
+    with requests.get(
+        f"{Backend_URL}/stream",
+        params={"fps": STREAM_FPS[sim_speed], "session_id": st.session_state.session_id},
+        stream=True
+    ) as resp:
+        if not resp.headers.get("content-type", "").startswith("text/event-stream"):
+            try:
+                st.error(resp.json().get("error", "Backend /stream did not return an event stream."))
+            except Exception:
+                st.error("Backend /stream did not return an event stream.")
+                st.code(resp.text)
+            st.session_state.running = False
+            st.stop()
 
-        # Get next frame
-        resp = requests.get(f"{Backend_URL}/step")
         try:
-            frame = resp.json()
-        except Exception:
-            st.error("Backend /step did not return JSON.")
-            st.code(resp.text)
-            st.stop()
+            for frame in iter_sse_frames(resp):
+                extend_history(st.session_state.history, frame)
 
-        if "error" in frame:
-            st.error(frame["error"])
+                # Tracking view and truth view side by side, as one image
+                placeholder.image(st.session_state.renderer.update(frame, st.session_state.history))
+        except RuntimeError as e:
             st.session_state.running = False
-            break
-
-        # Two side-by-side plots
-        colA, colB = placeholder.columns(2)
-
-        with colA:
-            fig1 = plot_tracking_view(frame)
-            colA.pyplot(fig1)
-            plt.close(fig1)
-
-        with colB:
-            fig2 = plot_truth_view(frame)
-            colB.pyplot(fig2)
-            plt.close(fig2)
-
-        # Speed control
-        if sim_speed == "Normal":
-            time.sleep(0.02)
-        elif sim_speed == "Fast":
-            time.sleep(0.005)
-        else:
-            time.sleep(0.0001)
+            st.error(str(e))
+            st.stop()
+
+    # Stream ended, the run is out of frames
+    st.session_state.running = False
+    st.info("Simulation finished, no frames left.")
@@ -1,4 +1,5 @@
 #include "association.h"
+#include <cmath>
 #include <limits>
 
 // Same methodology as python files (utilizing Nearest Neighbor or PDA for state estimation)
@@ -69,3 +70,55 @@ PDAResult associate_pda(const std::vector<Vector>& measurements, const Vector& z
     return result;
 }
 
+int associate_nn(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, const Eigen::Matrix2d& S) {
+    const Eigen::LLT<Eigen::Matrix2d> llt(S);
+    const Eigen::Vector2d center(z_pred(0), z_pred(1));
+    double best_d2 = std::numeric_limits<double>::infinity();
+    int best_index = -1;
+
+    for (Eigen::Index i = 0; i < measurements.rows(); ++i) {
+        Eigen::Vector2d diff = measurements.row(i).transpose() - center;
+        double d2 = llt.matrixL().solve(diff).squaredNorm();   // diffᵀ S⁻¹ diff
+
+        if (d2 < best_d2) {
+            best_d2 = d2;
+            best_index = static_cast<int>(i);
+        }
+    }
+
+    return best_index;
+}
+
+PDAArrayResult associate_pda(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, const Eigen::Matrix2d& R) {
+    PDAArrayResult result;
+
+    const Eigen::Index m = measurements.rows();
+    if (m == 0) {
+        // Match Python: no measurements
+        result.betas = Vector();
+        result.z_fused = Vector();  // empty
+        return result;
+    }
+
+    const Eigen::LLT<Eigen::Matrix2d> llt(R);
+    const Eigen::Vector2d center(z_pred(0), z_pred(1));
+
+    // Likelihoods (written straight into betas, normalized below)
+    result.betas.resize(m);
+    for (Eigen::Index i = 0; i < m; ++i) {
+        Eigen::Vector2d diff = measurements.row(i).transpose() - center;
+        result.betas(i) = std::exp(-0.5 * llt.matrixL().solve(diff).squaredNorm());
+    }
+
+    double sum_likelihoods = result.betas.sum();
+    if (sum_likelihoods == 0.0) {
+        result.betas.setConstant(1.0 / static_cast<double>(m));
+    } else {
+        result.betas /= sum_likelihoods;
+    }
+
+    // Fused measurement z̄ = Σ βᵢ zᵢ
+    result.z_fused = (measurements.transpose() * result.betas);
+
+    return result;
+}
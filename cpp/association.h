@@ -15,3 +15,17 @@ struct PDAResult {
 };
 
 PDAResult associate_pda(const std::vector<Vector>& measurements, const Vector& z_pred, const Matrix& R);
+
+// Zero-copy variants over the (M, 2) NumPy measurement array (see gating.h)
+using MeasurementMatrix = Eigen::Matrix<double, Eigen::Dynamic, 2, Eigen::RowMajor>;
+using MeasurementRef = Eigen::Ref<const MeasurementMatrix>;
+
+int associate_nn(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, const Eigen::Matrix2d& S);
+
+// Same as PDAResult but betas stay in an Eigen vector (handed to Python as a NumPy array, not a list)
+struct PDAArrayResult {
+    Vector z_fused;
+    Vector betas;
+};
+
+PDAArrayResult associate_pda(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, const Eigen::Matrix2d& R);
@@ -1,32 +1,179 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <pybind11/eigen.h>
+#include <pybind11/numpy.h>
+
+#include <stdexcept>
+#include <string>
 
 #include "kalman.h"
 #include "gating.h"
 #include "association.h"
+#include "frame.h"
 
 // The glue file
 // Allows Python to call all the C++ files
 
 namespace py = pybind11;
 
+using DoubleArray = py::array_t<double, py::array::c_style>;
+using ByteArray = py::array_t<uint8_t, py::array::c_style>;
+using IntArray = py::array_t<int32_t, py::array::c_style>;
+
+// Checks a NumPy buffer has the expected shape (-1 = any length)
+static void check_shape(const py::array& arr, std::initializer_list<py::ssize_t> shape, const char* name) {
+    bool ok = arr.ndim() == static_cast<py::ssize_t>(shape.size());
+    int axis = 0;
+    for (py::ssize_t dim : shape) {
+        if (ok && dim >= 0 && arr.shape(axis) != dim) {
+            ok = false;
+        }
+        ++axis;
+    }
+    if (!ok) {
+        throw std::invalid_argument(std::string("unexpected shape for ") + name);
+    }
+}
+
+// Uses the caller's buffer when one is given, otherwise allocates a fresh one
+template <typename Array>
+static Array output_buffer(py::object given, std::initializer_list<py::ssize_t> shape, const char* name) {
+    if (given.is_none()) {
+        return Array(std::vector<py::ssize_t>(shape));
+    }
+    Array arr = given.cast<Array>();
+    check_shape(arr, shape, name);
+    return arr;
+}
+
+// Kalman entry points: arrays with the constant velocity shapes are copied into stack matrices,
+// run through the allocation-free fixed-size path and written back, everything else uses the dynamic version
+static void kalman_predict_py(Eigen::Ref<Matrix> x, Eigen::Ref<Matrix> P,
+                              const Eigen::Ref<const Matrix> F, const Eigen::Ref<const Matrix> Q) {
+    if (x.rows() == 4 && x.cols() == 1 && P.rows() == 4 && P.cols() == 4) {
+        StateVector xf = x;
+        StateMatrix Pf = P;
+        kalman_predict_cv(xf, Pf, F, Q);
+        x = xf;
+        P = Pf;
+        return;
+    }
+    kalman_predict(x, P, F, Q);
+}
+
+static void kalman_update_py(Eigen::Ref<Matrix> x, Eigen::Ref<Matrix> P,
+                             const Eigen::Ref<const Matrix> z, const Eigen::Ref<const Matrix> H,
+                             const Eigen::Ref<const Matrix> R) {
+    if (x.cols() == 1 && z.cols() == 1 && is_cv_model(x.rows(), z.rows())) {
+        StateVector xf = x;
+        StateMatrix Pf = P;
+        kalman_update_cv(xf, Pf, z, H, R);
+        x = xf;
+        P = Pf;
+        return;
+    }
+    kalman_update(x, P, z, H, R);
+}
+
+// Zero-copy gating over the (M, 2) frame array, results are written straight into a NumPy buffer
+static py::array_t<int64_t> gate_measurements_py(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, double gate_threshold) {
+    py::array_t<int64_t> indices(measurements.rows());
+    int count = gate_measurements_indices(measurements, z_pred, gate_threshold, indices.mutable_data());
+    indices.resize({static_cast<py::ssize_t>(count)});
+    return indices;
+}
+
+static py::array_t<bool> gate_mask_py(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, double gate_threshold) {
+    py::array_t<bool> mask(measurements.rows());
+    gate_measurements_mask(measurements, z_pred, gate_threshold, reinterpret_cast<uint8_t*>(mask.mutable_data()));
+    return mask;
+}
+
+// step_frame(states, covs, measurements, params, out_predicted=None, out_fused=None, out_has_meas=None, out_num_gated=None)
+// states (N, 4) and covs (N, 4, 4) are float64 C-contiguous arrays updated in place, measurements is (M, 2)
+// num_threads == 1 runs on the calling thread, anything else uses the thread pool over blocks of tracks
+static py::tuple run_frame(DoubleArray states, DoubleArray covs, DoubleArray measurements,
+                           const FrameParams& params,
+                           py::object out_predicted, py::object out_fused,
+                           py::object out_has_meas, py::object out_num_gated, int num_threads) {
+    const py::ssize_t n = states.ndim() == 2 ? states.shape(0) : -1;
+    check_shape(states, {-1, 4}, "states");
+    check_shape(covs, {n, 4, 4}, "covs");
+    check_shape(measurements, {-1, 2}, "measurements");
+
+    DoubleArray predicted = output_buffer<DoubleArray>(out_predicted, {n, 2}, "out_predicted");
+    DoubleArray fused = output_buffer<DoubleArray>(out_fused, {n, 2}, "out_fused");
+    ByteArray has_meas = output_buffer<ByteArray>(out_has_meas, {n}, "out_has_meas");
+    IntArray num_gated = output_buffer<IntArray>(out_num_gated, {n}, "out_num_gated");
+
+    double* x = states.mutable_data();
+    double* P = covs.mutable_data();
+    const double* z = measurements.data();
+    const int num_meas = static_cast<int>(measurements.shape(0));
+    FrameOutputs out{predicted.mutable_data(), fused.mutable_data(), has_meas.mutable_data(), num_gated.mutable_data()};
+
+    {
+        py::gil_scoped_release release;
+        if (num_threads == 1) {
+            step_frame(x, P, static_cast<int>(n), z, num_meas, params, out);
+        } else {
+            step_frame_parallel(x, P, static_cast<int>(n), z, num_meas, params, out, num_threads);
+        }
+    }
+
+    return py::make_tuple(predicted, fused, has_meas, num_gated);
+}
+
+static py::tuple step_frame_py(DoubleArray states, DoubleArray covs, DoubleArray measurements,
+                               const FrameParams& params,
+                               py::object out_predicted, py::object out_fused,
+                               py::object out_has_meas, py::object out_num_gated) {
+    return run_frame(states, covs, measurements, params, out_predicted, out_fused, out_has_meas, out_num_gated, 1);
+}
+
+static py::tuple step_frame_parallel_py(DoubleArray states, DoubleArray covs, DoubleArray measurements,
+                                        const FrameParams& params, int num_threads,
+                                        py::object out_predicted, py::object out_fused,
+                                        py::object out_has_meas, py::object out_num_gated) {
+    return run_frame(states, covs, measurements, params, out_predicted, out_fused, out_has_meas, out_num_gated, num_threads);
+}
+
 PYBIND11_MODULE(tracker_cpp, m) {
     m.doc() = "C++ acceleration module for radar tracking";
 
-    // Kalman functions
-    m.def("kalman_predict", &kalman_predict,
+    // Kalman functions (constant velocity shapes go through the fixed-size path)
+    m.def("kalman_predict", &kalman_predict_py,
           "Kalman prediction step");
 
-    m.def("kalman_update", &kalman_update,
+    m.def("kalman_update", &kalman_update_py,
           "Kalman update step");
 
-    // Gating
-    m.def("gate_measurements", &gate_measurements,
+    m.def("kalman_predict_dynamic", &kalman_predict,
+          "Kalman prediction step (dynamically sized path)");
+
+    m.def("kalman_update_dynamic", &kalman_update,
+          "Kalman update step (dynamically sized path)");
+
+    // Gating (the (M, 2) array overloads come first so NumPy frames take the zero-copy path)
+    m.def("gate_measurements", &gate_measurements_py,
+          "Return indices of measurements inside the gate (NumPy int64 array)",
+          py::arg("measurements"), py::arg("z_pred"), py::arg("gate_threshold"));
+
+    m.def("gate_measurements",
+          py::overload_cast<const std::vector<Vector>&, const Vector&, double>(&gate_measurements),
           "Return indices of measurements inside the gate");
 
+    m.def("gate_mask", &gate_mask_py,
+          "Return a boolean mask of measurements inside the gate",
+          py::arg("measurements"), py::arg("z_pred"), py::arg("gate_threshold"));
+
     // Nearest Neighbor
-    m.def("associate_nn", &associate_nn,
+    m.def("associate_nn",
+          py::overload_cast<const MeasurementRef&, const Eigen::Ref<const Vector>&, const Eigen::Matrix2d&>(&associate_nn),
+          "Nearest Neighbor association");
+
+    m.def("associate_nn",
+          py::overload_cast<const std::vector<Vector>&, const Vector&, const Matrix&>(&associate_nn),
           "Nearest Neighbor association");
 
     // PDA
@@ -34,6 +181,43 @@ PYBIND11_MODULE(tracker_cpp, m) {
         .def_readonly("z_fused", &PDAResult::z_fused)
         .def_readonly("betas", &PDAResult::betas);
 
-    m.def("associate_pda", &associate_pda,
+    py::class_<PDAArrayResult>(m, "PDAArrayResult")
+        .def_readonly("z_fused", &PDAArrayResult::z_fused)
+        .def_readonly("betas", &PDAArrayResult::betas);
+
+    m.def("associate_pda",
+          py::overload_cast<const MeasurementRef&, const Eigen::Ref<const Vector>&, const Eigen::Matrix2d&>(&associate_pda),
+          "Probabilistic Data Association");
+
+    m.def("associate_pda",
+          py::overload_cast<const std::vector<Vector>&, const Vector&, const Matrix&>(&associate_pda),
           "Probabilistic Data Association");
+
+    // Frame level entry point
+    py::enum_<AssociationMethod>(m, "AssociationMethod")
+        .value("NN", ASSOC_NN)
+        .value("PDA", ASSOC_PDA);
+
+    py::class_<FrameParams>(m, "FrameParams")
+        .def(py::init<>())
+        .def_readwrite("F", &FrameParams::F)
+        .def_readwrite("Q", &FrameParams::Q)
+        .def_readwrite("H", &FrameParams::H)
+        .def_readwrite("R", &FrameParams::R)
+        .def_readwrite("R_assoc", &FrameParams::R_assoc)
+        .def_readwrite("gate_threshold", &FrameParams::gate_threshold)
+        .def_readwrite("method", &FrameParams::method);
+
+    m.def("step_frame", &step_frame_py,
+          "Predict, gate, associate and update every track of a frame (updates states/covs in place, releases the GIL)",
+          py::arg("states").noconvert(), py::arg("covs").noconvert(), py::arg("measurements"), py::arg("params"),
+          py::arg("out_predicted") = py::none(), py::arg("out_fused") = py::none(),
+          py::arg("out_has_meas") = py::none(), py::arg("out_num_gated") = py::none());
+
+    m.def("step_frame_parallel", &step_frame_parallel_py,
+          "step_frame over blocks of tracks on a thread pool (num_threads=0 uses every core), same results as step_frame",
+          py::arg("states").noconvert(), py::arg("covs").noconvert(), py::arg("measurements"), py::arg("params"),
+          py::arg("num_threads") = 0,
+          py::arg("out_predicted") = py::none(), py::arg("out_fused") = py::none(),
+          py::arg("out_has_meas") = py::none(), py::arg("out_num_gated") = py::none());
 }
@@ -0,0 +1,178 @@
+#include "frame.h"
+#include "kalman.h"
+#include <algorithm>
+#include <atomic>
+#include <cmath>
+#include <limits>
+#include <thread>
+
+// Same math as KalmanMath / Gating / AssociateNN / AssociatePDA, just for the whole frame at once
+
+using Vector4 = Eigen::Vector4d;
+using Vector2 = Eigen::Vector2d;
+using RowMatrix4 = Eigen::Matrix<double, 4, 4, Eigen::RowMajor>;
+
+void predict_and_gate_track(double* state, double* cov,
+                            const double* measurements, int num_meas,
+                            const FrameParams& params, FrameOutputs out, int track,
+                            std::vector<int>& gated) {
+
+    Eigen::Map<Vector4> x_buf(state);
+    Eigen::Map<RowMatrix4> P_buf(cov);
+    StateVector x = x_buf;
+    StateMatrix P = P_buf;
+
+    // Predict
+    kalman_predict_cv(x, P, params.F, params.Q);
+    x_buf = x;
+    P_buf = P;
+
+    Vector2 z_pred = params.H * x;
+    out.predicted[2 * track] = z_pred(0);
+    out.predicted[2 * track + 1] = z_pred(1);
+
+    // Gate (Euclidean, like Gate.gate_measurement)
+    gated.clear();
+    for (int j = 0; j < num_meas; ++j) {
+        Vector2 diff(measurements[2 * j] - z_pred(0), measurements[2 * j + 1] - z_pred(1));
+        if (diff.norm() <= params.gate_threshold) {
+            gated.push_back(j);
+        }
+    }
+    out.num_gated[track] = static_cast<int32_t>(gated.size());
+}
+
+void associate_and_update_track(double* state, double* cov,
+                                const double* measurements,
+                                const FrameParams& params, FrameOutputs out, int track,
+                                const std::vector<int>& gated) {
+
+    Eigen::Map<Vector4> x_buf(state);
+    Eigen::Map<RowMatrix4> P_buf(cov);
+    StateVector x = x_buf;
+    StateMatrix P = P_buf;
+    Vector2 z_pred(out.predicted[2 * track], out.predicted[2 * track + 1]);
+
+    if (gated.empty()) {
+        out.has_meas[track] = 0;
+        out.fused[2 * track] = 0.0;
+        out.fused[2 * track + 1] = 0.0;
+        return;
+    }
+
+    // Associate
+    Vector2 z = Vector2::Zero();
+    if (params.method == ASSOC_NN) {
+        double best = std::numeric_limits<double>::infinity();
+        for (int j : gated) {
+            Vector2 diff(measurements[2 * j] - z_pred(0), measurements[2 * j + 1] - z_pred(1));
+            double d = diff.norm();
+            if (d < best) {
+                best = d;
+                z = Vector2(measurements[2 * j], measurements[2 * j + 1]);
+            }
+        }
+    } else {
+        Eigen::LLT<Matrix2> llt(params.R_assoc);
+        double sum_L = 0.0;
+        Vector2 weighted = Vector2::Zero();
+        Vector2 plain = Vector2::Zero();
+        for (int j : gated) {
+            Vector2 zj(measurements[2 * j], measurements[2 * j + 1]);
+            Vector2 diff = zj - z_pred;
+            double L = std::exp(-0.5 * llt.matrixL().solve(diff).squaredNorm());
+            sum_L += L;
+            weighted += L * zj;
+            plain += zj;
+        }
+        // Equal weights when every likelihood underflows (same fallback as the Python PDA)
+        z = (sum_L == 0.0) ? Vector2(plain / static_cast<double>(gated.size())) : Vector2(weighted / sum_L);
+    }
+
+    out.has_meas[track] = 1;
+    out.fused[2 * track] = z(0);
+    out.fused[2 * track + 1] = z(1);
+
+    // Update
+    kalman_update_cv(x, P, z, params.H, params.R);
+    x_buf = x;
+    P_buf = P;
+}
+
+void step_frame(double* states, double* covs, int num_tracks,
+                const double* measurements, int num_meas,
+                const FrameParams& params, FrameOutputs out) {
+
+    std::vector<int> gated;
+    gated.reserve(num_meas);
+
+    for (int i = 0; i < num_tracks; ++i) {
+        step_track(states + 4 * i, covs + 16 * i, measurements, num_meas, params, out, i, gated);
+    }
+}
+
+void step_track(double* state, double* cov,
+                const double* measurements, int num_meas,
+                const FrameParams& params, FrameOutputs out, int track,
+                std::vector<int>& gated) {
+
+    predict_and_gate_track(state, cov, measurements, num_meas, params, out, track, gated);
+    associate_and_update_track(state, cov, measurements, params, out, track, gated);
+}
+
+// Tracks per task, big enough that a task outweighs taking it off the shared counter
+static constexpr int kTrackBlock = 64;
+
+// Runs fn(worker, 0) ... fn(worker, count - 1) on num_threads workers pulling indices from a shared counter
+// (each index writes only its own outputs, so the scheduling order never changes the results)
+template <typename Fn>
+static void parallel_for(int count, int num_threads, Fn&& fn) {
+    if (num_threads == 1) {
+        for (int i = 0; i < count; ++i) {
+            fn(0, i);
+        }
+        return;
+    }
+
+    std::atomic<int> next{0};
+    auto worker = [&](int w) {
+        for (int i = next.fetch_add(1); i < count; i = next.fetch_add(1)) {
+            fn(w, i);
+        }
+    };
+
+    std::vector<std::thread> pool;
+    pool.reserve(num_threads - 1);
+    for (int t = 1; t < num_threads; ++t) {
+        pool.emplace_back(worker, t);
+    }
+    worker(0);
+    for (std::thread& thread : pool) {
+        thread.join();
+    }
+}
+
+void step_frame_parallel(double* states, double* covs, int num_tracks,
+                         const double* measurements, int num_meas,
+                         const FrameParams& params, FrameOutputs out, int num_threads) {
+
+    if (num_threads <= 0) {
+        num_threads = static_cast<int>(std::max(1u, std::thread::hardware_concurrency()));
+    }
+    const int num_blocks = (num_tracks + kTrackBlock - 1) / kTrackBlock;
+    num_threads = std::max(1, std::min(num_threads, num_blocks));
+
+    // NN and PDA pick measurements for every track on its own, so tracks split freely into blocks
+    // One gate scratch buffer per worker, reused for every track it runs
+    std::vector<std::vector<int>> scratch(num_threads);
+    for (std::vector<int>& gated : scratch) {
+        gated.reserve(num_meas);
+    }
+
+    parallel_for(num_blocks, num_threads, [&](int w, int block) {
+        const int end = std::min(num_tracks, (block + 1) * kTrackBlock);
+        for (int i = block * kTrackBlock; i < end; ++i) {
+            step_track(states + 4 * i, covs + 16 * i, measurements, num_meas, params, out, i, scratch[w]);
+        }
+    });
+}
@@ -0,0 +1,63 @@
+#pragma once
+#include <Eigen/Dense>
+#include <cstdint>
+#include <vector>
+
+// Frame level tracking: predict, gate, associate and update every track of a frame in one call
+// States, covariances and measurements are read straight out of (row-major) NumPy buffers, no per-track copies
+
+using Matrix4 = Eigen::Matrix4d;
+using Matrix2 = Eigen::Matrix2d;
+using Matrix24 = Eigen::Matrix<double, 2, 4>;
+
+enum AssociationMethod {
+    ASSOC_NN = 0,
+    ASSOC_PDA = 1
+};
+
+struct FrameParams {
+    Matrix4 F = Matrix4::Identity();   // State transition
+    Matrix4 Q = Matrix4::Zero();       // Process noise
+    Matrix24 H = Matrix24::Identity(); // Measurement matrix
+    Matrix2 R = Matrix2::Identity();   // Measurement noise used by the Kalman update
+    Matrix2 R_assoc = Matrix2::Identity(); // Covariance used for the PDA likelihoods
+    double gate_threshold = 50.0;     // Euclidean gate radius
+    AssociationMethod method = ASSOC_NN;
+};
+
+// Caller owned output buffers, one row per track
+struct FrameOutputs {
+    double* predicted;  // (N, 2) predicted measurements
+    double* fused;      // (N, 2) measurement used for the update (NN pick or PDA z̄)
+    uint8_t* has_meas;  // (N,) 1 when the track was updated
+    int32_t* num_gated; // (N,) number of measurements inside the gate
+};
+
+// The two halves of a track's cycle: predict + gate (fills `gated`), then associate + update from that gated set
+void predict_and_gate_track(double* state, double* cov,
+                            const double* measurements, int num_meas,
+                            const FrameParams& params, FrameOutputs out, int track,
+                            std::vector<int>& gated);
+
+void associate_and_update_track(double* state, double* cov,
+                                const double* measurements,
+                                const FrameParams& params, FrameOutputs out, int track,
+                                const std::vector<int>& gated);
+
+// Runs one track through predict -> gate -> associate -> update
+// `gated` is scratch space so repeated calls do not allocate
+void step_track(double* state, double* cov,
+                const double* measurements, int num_meas,
+                const FrameParams& params, FrameOutputs out, int track,
+                std::vector<int>& gated);
+
+// states is (N, 4), covs is (N, 4, 4) and measurements is (M, 2), all row-major and updated in place
+void step_frame(double* states, double* covs, int num_tracks,
+                const double* measurements, int num_meas,
+                const FrameParams& params, FrameOutputs out);
+
+// Same results as step_frame (bit for bit), with the tracks split into fixed size blocks
+// on a pool of num_threads std::threads (0 = one per hardware thread)
+void step_frame_parallel(double* states, double* covs, int num_tracks,
+                         const double* measurements, int num_meas,
+                         const FrameParams& params, FrameOutputs out, int num_threads);
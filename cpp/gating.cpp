@@ -15,3 +15,31 @@ std::vector<int> gate_measurements(const std::vector<Vector>& measurements, cons
 
     return inside;
 }
+
+int gate_measurements_mask(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, double gate_threshold, uint8_t* mask) {
+    const Eigen::Vector2d center(z_pred(0), z_pred(1));
+    int count = 0;
+
+    for (Eigen::Index i = 0; i < measurements.rows(); ++i) {
+        double dist = (measurements.row(i).transpose() - center).norm();   // Euclidean distance
+        mask[i] = dist <= gate_threshold ? 1 : 0;
+        count += mask[i];
+    }
+
+    return count;
+}
+
+int gate_measurements_indices(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, double gate_threshold, int64_t* indices) {
+    const Eigen::Vector2d center(z_pred(0), z_pred(1));
+    int count = 0;
+
+    for (Eigen::Index i = 0; i < measurements.rows(); ++i) {
+        double dist = (measurements.row(i).transpose() - center).norm();   // Euclidean distance
+
+        if (dist <= gate_threshold) {
+            indices[count++] = i;
+        }
+    }
+
+    return count;
+}
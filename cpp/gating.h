@@ -1,6 +1,7 @@
 #pragma once
 #include <Eigen/Dense>
 #include <vector>
+#include <cstdint>
 
 using Vector = Eigen::VectorXd;
 using Matrix = Eigen::MatrixXd;
@@ -8,3 +9,12 @@ using Matrix = Eigen::MatrixXd;
 // Return indices of measurements inside the gate
 std::vector<int> gate_measurements(const std::vector<Vector>& measurements, const Vector& z_pred, double gate_threshold);
 
+// Zero-copy variants that read the (M, 2) NumPy frame array directly
+using MeasurementMatrix = Eigen::Matrix<double, Eigen::Dynamic, 2, Eigen::RowMajor>;
+using MeasurementRef = Eigen::Ref<const MeasurementMatrix>;
+
+// Writes 1/0 into mask (length M) for measurements inside/outside the gate, returns how many are inside
+int gate_measurements_mask(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, double gate_threshold, uint8_t* mask);
+
+// Writes the indices of measurements inside the gate into indices (room for M entries), returns how many were written
+int gate_measurements_indices(const MeasurementRef& measurements, const Eigen::Ref<const Vector>& z_pred, double gate_threshold, int64_t* indices);
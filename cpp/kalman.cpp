@@ -24,3 +24,34 @@ void kalman_update(Eigen::Ref<Matrix> x,
     Matrix I = Matrix::Identity(P.rows(), P.cols());
     P = (I - K * H) * P;
 }
+
+bool is_cv_model(Eigen::Index state_dim, Eigen::Index meas_dim) {
+    return state_dim == 4 && meas_dim == 2;
+}
+
+void kalman_predict_cv(StateVector& x,
+                       StateMatrix& P,
+                       const StateMatrix& F,
+                       const StateMatrix& Q) {
+
+    x = F * x;
+    P = F * P * F.transpose() + Q;
+}
+
+void kalman_update_cv(StateVector& x,
+                      StateMatrix& P,
+                      const MeasVector& z,
+                      const ObsMatrix& H,
+                      const MeasMatrix& R) {
+
+    MeasVector y = z - H * x;
+    MeasMatrix S = H * P * H.transpose() + R;
+    Eigen::Matrix<double, 4, 2> PHt = P * H.transpose();
+
+    // K = P Hᵀ S⁻¹, solved as S Kᵀ = (P Hᵀ)ᵀ since S is symmetric positive definite
+    Eigen::LLT<MeasMatrix> llt(S);
+    Eigen::Matrix<double, 4, 2> K = llt.solve(PHt.transpose()).transpose();
+
+    x = x + K * y;
+    P = (StateMatrix::Identity() - K * H) * P;
+}
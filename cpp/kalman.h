@@ -4,6 +4,7 @@
 using Vector = Eigen::VectorXd;
 using Matrix = Eigen::MatrixXd;
 
+// General (dynamically sized) Kalman equations, used for any model that is not the 4-state constant velocity one
 void kalman_predict(Eigen::Ref<Matrix> x,
                     Eigen::Ref<Matrix> P,
                     const Eigen::Ref<const Matrix> F,
@@ -14,3 +15,25 @@ void kalman_update(Eigen::Ref<Matrix> x,
                    const Eigen::Ref<const Matrix> z,
                    const Eigen::Ref<const Matrix> H,
                    const Eigen::Ref<const Matrix> R);
+
+// Fixed-size constant velocity model: 4 states [x, y, vx, vy], 2 measurements [x, y]
+// Every temporary lives on the stack and S is factored with LLT instead of being inverted
+using StateVector = Eigen::Vector4d;
+using StateMatrix = Eigen::Matrix4d;
+using MeasVector = Eigen::Vector2d;
+using MeasMatrix = Eigen::Matrix2d;
+using ObsMatrix = Eigen::Matrix<double, 2, 4>;
+
+void kalman_predict_cv(StateVector& x,
+                       StateMatrix& P,
+                       const StateMatrix& F,
+                       const StateMatrix& Q);
+
+void kalman_update_cv(StateVector& x,
+                      StateMatrix& P,
+                      const MeasVector& z,
+                      const ObsMatrix& H,
+                      const MeasMatrix& R);
+
+// True when the arguments have the constant velocity shapes, so the fixed-size path can be used
+bool is_cv_model(Eigen::Index state_dim, Eigen::Index meas_dim);